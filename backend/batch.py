@@ -0,0 +1,226 @@
+"""Analyse par lots : un répertoire de CV PDF et un CSV des profils de chaque candidat.
+
+Usage :
+    python batch.py --cv-dir ./cvs --csv candidates.csv --output results.jsonl --concurrency 4
+
+Le CSV contient une colonne `cv_file` (nom du PDF dans le répertoire) et les colonnes
+optionnelles `github_user`, `huggingface_user`, `portfolio_url`, `instagram_user`. Les PDF
+absents du CSV sont analysés sans profils externes. Chaque résultat est ajouté au fichier
+JSONL dès qu'il est prêt ; relancer la commande reprend là où elle s'était arrêtée.
+"""
+import os
+import csv
+import io
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+BATCH_CONCURRENCY = int(os.getenv("FLASHLIGHT_BATCH_CONCURRENCY", "4"))
+
+# Colonnes du CSV -> nom de plateforme utilisé par le pipeline
+SOURCE_COLUMNS = {
+    "github_user": "GitHub",
+    "huggingface_user": "Hugging Face",
+    "portfolio_url": "Personal Website",
+    "instagram_user": "Instagram",
+}
+
+# Étape du pipeline terminée par chaque événement de main.analysis_events
+EVENT_STAGES = {
+    "cv_extracted": "cv_extraction",
+    "source_fetched": "sources",
+    "plan": "sources",
+    "summary_done": "sources",
+    "skill": "synthesis",
+    "profile": "synthesis",
+}
+
+# Signature de main.analysis_events
+PipelineRunner = Callable[..., AsyncIterator[Tuple[str, dict]]]
+
+
+@dataclass
+class Candidate:
+    candidate_id: str
+    cv_path: str
+    sources: Dict[str, Optional[str]]
+
+
+@dataclass
+class BatchReport:
+    done: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+    def add(self, record: dict) -> None:
+        if record["status"] == "done":
+            self.done += 1
+        else:
+            self.failed += 1
+        for stage, seconds in record["timings"].items():
+            self.stage_seconds[stage] += seconds
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        total = self.done + self.failed
+        return {
+            "candidates": total,
+            "done": self.done,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 2),
+            "candidates_per_minute": round(total / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "mean_stage_seconds": {
+                stage: round(seconds / total, 3) for stage, seconds in self.stage_seconds.items()
+            } if total else {},
+        }
+
+
+def parse_candidates_csv(text: str) -> Dict[str, Dict[str, Optional[str]]]:
+    """Associe chaque nom de fichier CV à ses identifiants de profils externes."""
+    sources_by_cv = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        cv_file = (row.get("cv_file") or "").strip()
+        if cv_file:
+            sources_by_cv[cv_file] = {
+                platform: (row.get(column) or "").strip() or None
+                for column, platform in SOURCE_COLUMNS.items()
+            }
+    return sources_by_cv
+
+
+def empty_sources() -> Dict[str, Optional[str]]:
+    return {platform: None for platform in SOURCE_COLUMNS.values()}
+
+
+def read_candidates(cv_dir: str, csv_path: Optional[str]) -> List[Candidate]:
+    sources_by_cv = {}
+    if csv_path:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            sources_by_cv = parse_candidates_csv(f.read())
+    return [
+        Candidate(name, os.path.join(cv_dir, name), sources_by_cv.get(name, empty_sources()))
+        for name in sorted(os.listdir(cv_dir))
+        if name.lower().endswith(".pdf")
+    ]
+
+
+def read_checkpoint(output_path: str) -> Set[str]:
+    """Retourne les candidats déjà analysés avec succès dans le fichier de sortie (les échecs sont relancés)."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record["status"] == "done":
+                    done.add(record["candidate"])
+            except (json.JSONDecodeError, KeyError):
+                # Dernière ligne tronquée par une interruption : le candidat sera relancé.
+                continue
+    return done
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def run_candidate(runner: PipelineRunner, candidate: Candidate, remove_cv: bool = False) -> dict:
+    """Exécute le pipeline pour un candidat et mesure le temps passé dans chaque étape.
+
+    Chaque intervalle entre deux événements est attribué à l'étape de l'événement qui le clôt.
+    """
+    loop = asyncio.get_running_loop()
+    timings: Dict[str, float] = defaultdict(float)
+    record = {"candidate": candidate.candidate_id}
+    last = time.perf_counter()
+    try:
+        cv_sha256 = await loop.run_in_executor(None, file_sha256, candidate.cv_path)
+        async for event, data in runner(candidate.cv_path, cv_sha256, candidate.sources, remove_cv=remove_cv):
+            now = time.perf_counter()
+            timings[EVENT_STAGES.get(event, event)] += now - last
+            last = now
+            if event == "profile":
+                record.update(status="done", profile=data)
+    except HTTPException as e:
+        record.update(status="failed", error=str(e.detail))
+    except Exception as e:
+        record.update(status="failed", error=str(e))
+    record["timings"] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+    return record
+
+
+async def iter_batch(
+    runner: PipelineRunner, candidates: Iterable[Candidate], concurrency: int = BATCH_CONCURRENCY, remove_cv: bool = False
+) -> AsyncIterator[dict]:
+    """Analyse les candidats avec au plus `concurrency` pipelines simultanés, dans l'ordre de fin."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(candidate: Candidate) -> dict:
+        async with semaphore:
+            return await run_candidate(runner, candidate, remove_cv=remove_cv)
+
+    tasks = [asyncio.ensure_future(bounded(candidate)) for candidate in candidates]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(cv_dir: str, csv_path: Optional[str], output_path: str, concurrency: int) -> dict:
+    # Import tardif : main importe ce module pour l'endpoint /analyze/batch.
+    from cache import close_store
+    from http_client import close_client, start_client
+    from main import analysis_events
+    from pdf_extraction import shutdown_pool
+    from skill_store import skill_store
+
+    already_done = read_checkpoint(output_path)
+    candidates = [c for c in read_candidates(cv_dir, csv_path) if c.candidate_id not in already_done]
+    print(f"{len(candidates)} candidates to analyze ({len(already_done)} already in {output_path})")
+
+    report = BatchReport()
+    start_client()
+    try:
+        with open(output_path, "a", encoding="utf-8") as output:
+            async for record in iter_batch(analysis_events, candidates, concurrency):
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                report.add(record)
+                print(f"[{report.done + report.failed}/{len(candidates)}] {record['candidate']}: {record['status']}")
+    finally:
+        await close_client()
+        shutdown_pool()
+        skill_store.close()
+        close_store()
+    return report.summary()
+
+
+def run_cli(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analyze a directory of CVs with the Flashlight pipeline.")
+    parser.add_argument("--cv-dir", required=True, help="Directory containing the candidates' PDF CVs.")
+    parser.add_argument("--csv", help="CSV with cv_file, github_user, huggingface_user, portfolio_url, instagram_user.")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file results are appended to.")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run_batch(args.cv_dir, args.csv, args.output, args.concurrency))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    run_cli()
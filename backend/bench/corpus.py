@@ -0,0 +1,94 @@
+"""Corpus de CV PDF synthétiques pour les benchmarks (générés sans dépendance externe).
+
+    python -m bench.corpus --out ./bench_cvs
+"""
+import os
+import random
+import argparse
+from typing import Dict, List
+
+# Nombre de pages par taille de CV
+CV_SIZES: Dict[str, int] = {"small": 1, "medium": 3, "large": 12}
+LINES_PER_PAGE = 45
+
+SKILLS = [
+    "Python", "TypeScript", "React", "FastAPI", "Docker", "Kubernetes", "AWS", "GCP", "SQL", "PostgreSQL",
+    "PyTorch", "TensorFlow", "scikit-learn", "Airflow", "Spark", "Terraform", "Go", "Rust", "Java", "GraphQL",
+]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Maintained", "Shipped", "Automated"]
+OBJECTS = [
+    "a data pipeline", "a recommendation service", "the CI/CD platform", "a real-time dashboard",
+    "an NLP classifier", "the payments API", "a mobile onboarding flow", "an internal analytics tool",
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def cv_lines(candidate: int, pages: int) -> List[List[str]]:
+    rng = random.Random(candidate)
+    content = []
+    for page in range(pages):
+        lines = [f"Candidate {candidate} - Curriculum Vitae - page {page + 1}"]
+        while len(lines) < LINES_PER_PAGE:
+            skills = ", ".join(rng.sample(SKILLS, 3))
+            lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {skills}.")
+        content.append(lines)
+    return content
+
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+    """Écrit un PDF minimal valide : une police standard et un flux de texte par page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        text = " T* ".join(f"({_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 770 Td {text} ET".encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def synthetic_cv(candidate: int, size: str = "medium") -> bytes:
+    """CV déterministe pour un numéro de candidat donné : deux candidats différents ont des octets différents."""
+    return build_pdf(cv_lines(candidate, CV_SIZES[size]))
+
+
+def write_corpus(directory: str, per_size: int = 5) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    candidate = 0
+    for size in CV_SIZES:
+        for _ in range(per_size):
+            path = os.path.join(directory, f"cv_{size}_{candidate:04d}.pdf")
+            with open(path, "wb") as f:
+                f.write(synthetic_cv(candidate, size))
+            paths.append(path)
+            candidate += 1
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a corpus of synthetic CV PDFs.")
+    parser.add_argument("--out", default="bench_cvs")
+    parser.add_argument("--per-size", type=int, default=5)
+    args = parser.parse_args()
+    print(f"Wrote {len(write_corpus(args.out, args.per_size))} CVs to {args.out}")
@@ -0,0 +1,78 @@
+"""Remplaçant local de `genai.GenerativeModel` avec latence et taux d'erreur configurables."""
+import json
+import random
+import asyncio
+from typing import List
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from bench.corpus import SKILLS
+
+CHUNK_CHARACTERS = 80
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    latency = 0.5
+    error_rate = 0.0
+    calls = 0
+
+    def __init__(self, model_name: str, **kwargs):
+        self.model_name = model_name
+
+    @classmethod
+    def _delay(cls) -> float:
+        return max(0.0, random.uniform(0.75, 1.25) * cls.latency)
+
+    @staticmethod
+    def _answer(parts: List[str]) -> str:
+        prompt = "".join(str(part) for part in parts)
+        if '"professional_summary"' not in prompt:
+            return "The candidate builds production Python services and data pipelines with Docker and AWS."
+        rng = random.Random(len(prompt))
+
+        def skills(count: int) -> List[dict]:
+            return [
+                {"skill": skill, "confidence": rng.choice(["High", "Medium", "Low"]), "evidence": "CV: project"}
+                for skill in rng.sample(SKILLS, count)
+            ]
+
+        profile = {
+            "professional_summary": "Backend engineer with strong data and cloud experience.",
+            "technical_skills": skills(8),
+            "soft_skills": [{"skill": "Communication", "confidence": "Medium", "evidence": "CV: talks"}],
+            "tools_and_technologies": skills(6),
+        }
+        return "```json\n" + json.dumps(profile, indent=2) + "\n```"
+
+    async def generate_content_async(self, parts, generation_config=None, stream=False, **kwargs):
+        FakeGenerativeModel.calls += 1
+        if random.random() < self.error_rate:
+            await asyncio.sleep(self._delay() / 10)
+            raise google_exceptions.ResourceExhausted("Fake quota exceeded")
+        text = self._answer(parts if isinstance(parts, list) else [parts])
+        if not stream:
+            await asyncio.sleep(self._delay())
+            return FakeResponse(text)
+
+        delay = self._delay()
+        chunks = [text[i:i + CHUNK_CHARACTERS] for i in range(0, len(text), CHUNK_CHARACTERS)]
+
+        async def stream_chunks():
+            for chunk in chunks:
+                await asyncio.sleep(delay / len(chunks))
+                yield FakeResponse(chunk)
+
+        return stream_chunks()
+
+
+def install(latency: float, error_rate: float) -> None:
+    """Remplace `genai.GenerativeModel` ; à appeler avant le premier appel Gemini."""
+    FakeGenerativeModel.latency = latency
+    FakeGenerativeModel.error_rate = error_rate
+    genai.GenerativeModel = FakeGenerativeModel
@@ -0,0 +1,92 @@
+"""Réponses GitHub / Hugging Face / portfolio / Instagram servies par un transport httpx factice."""
+import json
+import zlib
+import random
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from bench.corpus import OBJECTS, SKILLS
+
+
+def github_repos(username: str, count: int = 120) -> list:
+    rng = random.Random(username)
+    return [
+        {
+            "id": i,
+            "name": f"{username}-project-{i}",
+            "full_name": f"{username}/{username}-project-{i}",
+            "owner": {"login": username, "avatar_url": f"https://avatars.example/{username}"},
+            "html_url": f"https://github.com/{username}/{username}-project-{i}",
+            "description": f"{rng.choice(OBJECTS).capitalize()} written with {rng.choice(SKILLS)}.",
+            "fork": rng.random() < 0.2,
+            "language": rng.choice(SKILLS),
+            "topics": rng.sample(["ml", "web", "cli", "data", "devops"], 2),
+            "stargazers_count": rng.randint(0, 500),
+            "pushed_at": f"202{rng.randint(0, 5)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T10:00:00Z",
+            "created_at": "2020-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+        for i in range(count)
+    ]
+
+
+def github_response(request: httpx.Request, segments: list, query: dict) -> httpx.Response:
+    """Liste paginée (en-tête Link) de /users/{u}/repos, /languages et /readme de chaque dépôt."""
+    headers = {"Content-Type": "application/json", "X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "4102444800"}
+    if segments[0] == "users":
+        username = segments[1]
+        per_page, page = int(query.get("per_page", ["30"])[0]), int(query.get("page", ["1"])[0])
+        repos = sorted(github_repos(username), key=lambda repo: repo["pushed_at"], reverse=True)
+        body = json.dumps(repos[(page - 1) * per_page:page * per_page])
+        if page * per_page < len(repos):
+            headers["Link"] = f'<https://api.github.com/users/{username}/repos?per_page={per_page}&sort=pushed&page={page + 1}>; rel="next"'
+    elif segments[-1] == "languages":
+        rng = random.Random(segments[2])
+        body = json.dumps({skill: rng.randint(1000, 90000) for skill in rng.sample(SKILLS, 3)})
+    else:
+        rng = random.Random(segments[2])
+        body = "# " + segments[2] + "\n[![build](https://ci.example/badge.svg)](https://ci.example)\n" + " ".join(
+            f"This project uses {rng.choice(SKILLS)} to build {rng.choice(OBJECTS)}." for _ in range(8)
+        )
+    etag = f'"{zlib.crc32(body.encode())}"'
+    headers["ETag"] = etag
+    if request.headers.get("If-None-Match") == etag:
+        return httpx.Response(304, headers={key: value for key, value in headers.items() if key != "Content-Type"})
+    return httpx.Response(200, text=body, headers=headers)
+
+
+def html_page(title: str, paragraphs: int = 20) -> str:
+    rng = random.Random(title)
+    body = "".join(f"<p>I {rng.choice(['built', 'shipped', 'designed'])} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}.</p>" for _ in range(paragraphs))
+    return (
+        f"<html><head><title>{title}</title><script>var tracking = 1;</script></head>"
+        f"<body><nav>Home | Blog | Contact</nav><main><h1>{title}</h1>{body}</main>"
+        f"<footer>© {title}</footer></body></html>"
+    )
+
+
+def instagram_page(username: str) -> str:
+    content = f"120 Followers, 80 Following, 40 Posts - Engineer and maker from {username} (@{username})"
+    return f'<html><head><meta name="description" content="{content}"></head><body></body></html>'
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    url = urlsplit(str(request.url))
+    segments = [segment for segment in url.path.split("/") if segment]
+    if url.hostname == "api.github.com":
+        return github_response(request, segments, parse_qs(url.query))
+    if url.hostname == "www.instagram.com":
+        return httpx.Response(200, text=instagram_page(segments[0] if segments else "unknown"))
+    return httpx.Response(200, text=html_page(f"{url.hostname}{url.path}"))
+
+
+def transport(latency: float = 0.05) -> httpx.AsyncBaseTransport:
+    """Transport asynchrone qui simule une latence réseau avant chaque réponse canonique."""
+
+    async def delayed(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(random.uniform(0.5, 1.5) * latency)
+        return handler(request)
+
+    return httpx.MockTransport(delayed)
@@ -0,0 +1,203 @@
+"""Benchmark hors ligne de /analyze/ : Gemini et les sites externes sont remplacés par des doublures locales.
+
+    cd backend
+    python -m bench.run --requests 200 --concurrency 20 --gemini-latency 0.5 --gemini-error-rate 0.05
+
+Chaque requête envoie un CV synthétique différent (les caches ne servent donc que si
+`--profiles` est inférieur au nombre de requêtes). Le rapport donne le débit, les percentiles
+de latence, le temps moyen par étape et le temps pendant lequel la boucle d'événements a été bloquée.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+
+from batch import EVENT_STAGES
+from bench import fake_gemini, fake_upstreams
+from bench.corpus import CV_SIZES, synthetic_cv
+
+
+def configure_environment(workdir: str) -> None:
+    """Isole les bases SQLite du benchmark et accélère les reprises ; à appeler avant d'importer main."""
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    os.environ["FLASHLIGHT_CACHE_DB"] = os.path.join(workdir, "cache.sqlite3")
+    os.environ["FLASHLIGHT_JOBS_DB"] = os.path.join(workdir, "jobs.sqlite3")
+    os.environ["FLASHLIGHT_SKILLS_DB"] = os.path.join(workdir, "skills.sqlite3")
+    os.environ["FLASHLIGHT_JOBS_UPLOAD_DIR"] = os.path.join(workdir, "job_uploads")
+    os.environ.setdefault("FLASHLIGHT_GEMINI_BACKOFF_BASE", "0.05")
+
+
+class LoopLagMonitor:
+    """Mesure le retard de réveil d'une tâche périodique : tout retard est du temps où la boucle était bloquée."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.blocked_seconds = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            if lag > 0.001:
+                self.blocked_seconds += lag
+                self.max_lag = max(self.max_lag, lag)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def one_request(client: httpx.AsyncClient, index: int, args: argparse.Namespace) -> Dict:
+    """Envoie une analyse et chronomètre chaque événement renvoyé par le flux SSE."""
+    sizes = list(CV_SIZES)
+    cv = synthetic_cv(index, sizes[index % len(sizes)])
+    profile = index % args.profiles
+    data = {
+        "github_user": f"dev{profile}",
+        "huggingface_user": f"dev{profile}",
+        "portfolio_url": f"dev{profile}.example.com",
+        "instagram_user": f"dev{profile}",
+    }
+    files = {"cv_file": (f"cv_{index}.pdf", cv, "application/pdf")}
+
+    stages: Dict[str, float] = defaultdict(float)
+    started = last = time.perf_counter()
+    first_event = None
+    status = "error"
+    if args.endpoint == "analyze":
+        response = await client.post("/analyze/", files=files, data=data)
+        status = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+    else:
+        async with client.stream("POST", "/analyze/stream", files=files, data=data) as response:
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                    now = time.perf_counter()
+                    first_event = first_event or now - started
+                    stages[EVENT_STAGES.get(event, event)] += now - last
+                    last = now
+                    if event == "profile":
+                        status = "ok"
+    return {
+        "status": status,
+        "latency": time.perf_counter() - started,
+        "first_event": first_event,
+        "stages": dict(stages),
+    }
+
+
+async def start_server(app) -> Tuple[uvicorn.Server, asyncio.Task, int]:
+    """Démarre un vrai serveur uvicorn dans la même boucle : ASGITransport mettrait le flux SSE en tampon."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, serving, server.servers[0].sockets[0].getsockname()[1]
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    import http_client
+    import main
+
+    fake_gemini.install(args.gemini_latency, args.gemini_error_rate)
+    http_client._client = httpx.AsyncClient(transport=fake_upstreams.transport(args.upstream_latency))
+
+    server, serving, port = await start_server(main.app)
+
+    monitor = LoopLagMonitor()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(client: httpx.AsyncClient, index: int) -> Dict:
+        async with semaphore:
+            return await one_request(client, index, args)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            monitor.start()
+            started = time.perf_counter()
+            results = await asyncio.gather(*(bounded(client, i) for i in range(args.requests)))
+            elapsed = time.perf_counter() - started
+            await monitor.stop()
+    finally:
+        server.should_exit = True
+        await serving
+
+    ok = [r for r in results if r["status"] == "ok"]
+    latencies = [r["latency"] for r in ok]
+    stage_totals: Dict[str, float] = defaultdict(float)
+    for result in ok:
+        for stage, seconds in result["stages"].items():
+            stage_totals[stage] += seconds
+    errors: Dict[str, int] = defaultdict(int)
+    for result in results:
+        if result["status"] != "ok":
+            errors[result["status"]] += 1
+
+    first_events = [r["first_event"] for r in ok if r["first_event"] is not None]
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "succeeded": len(ok),
+        "errors": dict(errors),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p95": round(percentile(latencies, 0.95), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+        },
+        "first_event_p50_seconds": round(percentile(first_events, 0.50), 4),
+        "mean_stage_seconds": {stage: round(total / len(ok), 4) for stage, total in stage_totals.items()} if ok else {},
+        "event_loop_blocked_seconds": round(monitor.blocked_seconds, 4),
+        "event_loop_max_lag_seconds": round(monitor.max_lag, 4),
+        "gemini_calls": fake_gemini.FakeGenerativeModel.calls,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test of the Flashlight analysis pipeline.")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoint", choices=("stream", "analyze"), default="stream",
+                        help="'stream' also reports per-stage times; 'analyze' measures the plain JSON endpoint.")
+    parser.add_argument("--profiles", type=int, default=10**9,
+                        help="Number of distinct external profiles; lower it to exercise the summary/HTTP caches.")
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    return parser.parse_args(argv)
+
+
+def run_cli(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="flashlight-bench-") as workdir:
+        configure_environment(workdir)
+        report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    run_cli()
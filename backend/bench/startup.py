@@ -0,0 +1,110 @@
+"""Vérifie le budget de démarrage : temps d'import de `main`, préchauffage et première requête.
+
+    cd backend
+    python -m bench.startup --import-budget 0.8 --first-request-budget 0.5
+
+Le temps d'import est mesuré dans des processus neufs (médiane de plusieurs essais). Le serveur
+est ensuite démarré avec les doublures de bench.run, sans latence simulée : la première requête
+ne mesure que le coût propre à l'application. La commande se termine avec le code 1 si un budget
+est dépassé, pour pouvoir l'utiliser en CI.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench import fake_gemini, fake_upstreams
+from bench.corpus import synthetic_cv
+from bench.run import configure_environment, start_server
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_import(runs: int) -> float:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    durations = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=backend_dir,
+            env={**os.environ, "PYTHONWARNINGS": "ignore"},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        durations.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(durations)
+
+
+async def measure_first_request(ready_timeout: float) -> Dict[str, float]:
+    import http_client
+    import main
+
+    fake_gemini.install(0.0, 0.0)
+    http_client._client = httpx.AsyncClient(transport=fake_upstreams.transport(0.0))
+    started = time.perf_counter()
+    server, serving, port = await start_server(main.app)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            while (await client.get("/ready")).status_code != 200:
+                if time.perf_counter() - started > ready_timeout:
+                    raise TimeoutError(f"/ready did not answer 200 within {ready_timeout}s")
+                await asyncio.sleep(0.02)
+            ready = time.perf_counter() - started
+
+            request_started = time.perf_counter()
+            response = await client.post(
+                "/analyze/",
+                files={"cv_file": ("cv.pdf", synthetic_cv(0, "medium"), "application/pdf")},
+                data={"github_user": "dev0", "portfolio_url": "dev0.example.com"},
+            )
+            response.raise_for_status()
+            first_request = time.perf_counter() - request_started
+    finally:
+        server.should_exit = True
+        await serving
+    return {"ready_seconds": ready, "first_request_seconds": first_request}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check the Flashlight startup and first-request budgets.")
+    parser.add_argument("--import-budget", type=float, default=0.8, help="Maximum median import time of main (s).")
+    parser.add_argument("--ready-budget", type=float, default=5.0, help="Maximum time until /ready answers 200 (s).")
+    parser.add_argument("--first-request-budget", type=float, default=0.5,
+                        help="Maximum latency of the first /analyze/ request once ready (s).")
+    parser.add_argument("--import-runs", type=int, default=3)
+    return parser.parse_args(argv)
+
+
+def run_cli(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="flashlight-startup-") as workdir:
+        configure_environment(workdir)
+        report = {"import_seconds": measure_import(args.import_runs)}
+        report.update(asyncio.run(measure_first_request(args.ready_budget * 2)))
+
+    budgets = {
+        "import_seconds": args.import_budget,
+        "ready_seconds": args.ready_budget,
+        "first_request_seconds": args.first_request_budget,
+    }
+    over = {name: round(report[name], 3) for name, budget in budgets.items() if report[name] > budget}
+    print(json.dumps({
+        "measured": {name: round(value, 3) for name, value in report.items()},
+        "budgets": budgets,
+        "over_budget": over,
+    }, indent=2))
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from metrics import CACHE_LOOKUPS
+
+# --- CONFIGURATION ---
+CACHE_DB_PATH = os.getenv("FLASHLIGHT_CACHE_DB", os.path.join(os.path.dirname(__file__), "flashlight_cache.sqlite3"))
+CACHE_MEMORY_ENTRIES = int(os.getenv("FLASHLIGHT_CACHE_MEMORY_ENTRIES", "256"))
+# Taille maximale (JSON sérialisé) du niveau mémoire de chaque cache, en plus du nombre d'entrées.
+CACHE_MEMORY_MAX_BYTES = int(os.getenv("FLASHLIGHT_CACHE_MEMORY_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_MAX_BYTES = int(os.getenv("FLASHLIGHT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+CACHE_TTL_SECONDS = int(os.getenv("FLASHLIGHT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def sha256_hex(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SQLiteStore:
+    """Stockage persistant clé/valeur partagé par tous les caches (un espace de noms par cache)."""
+
+    def __init__(self, path: str = CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (last_access)")
+        # Entrées référencées par des URL publiées : ni expiration ni éviction LRU, seulement
+        # `delete_durable` quand plus rien ne les référence.
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS durable_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(durable_entries)")}
+        if "created_at" not in columns:
+            try:
+                self._conn.execute("ALTER TABLE durable_entries ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError as e:
+                # Migration faite en même temps par un autre worker
+                if "duplicate column" not in str(e):
+                    raise
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, len(value), now + ttl, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def get_durable(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM durable_entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set_durable(self, namespace: str, key: str, value: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO durable_entries (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time()),
+            )
+            self._conn.commit()
+
+    def durable_keys(self, namespace: str, created_before: float) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM durable_entries WHERE namespace = ? AND created_at < ?", (namespace, created_before)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_durable(self, namespace: str, keys: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM durable_entries WHERE namespace = ? AND key = ?", [(namespace, key) for key in keys]
+            )
+            self._conn.commit()
+
+    def values(self, namespace: str) -> List[bytes]:
+        """Valeurs non expirées d'un espace de noms (sans mettre à jour leur date d'accès)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND expires_at >= ?", (namespace, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _evict(self, now: float) -> None:
+        """Supprime les entrées expirées puis les moins récemment utilisées jusqu'à repasser sous la limite."""
+        self._conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT namespace, key, size FROM cache_entries ORDER BY last_access").fetchall()
+        for namespace, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            total -= size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[SQLiteStore] = None
+
+
+def get_store() -> SQLiteStore:
+    global _store
+    if _store is None:
+        _store = SQLiteStore()
+    return _store
+
+
+def close_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+class TieredCache:
+    """Cache à deux niveaux : LRU en mémoire devant le stockage SQLite, valeurs sérialisées en JSON.
+
+    Le niveau mémoire est borné en nombre d'entrées et en octets ; une valeur plus grosse que
+    `max_bytes` n'est gardée que sur disque. Avec `durable`, les valeurs sont gardées sur disque sans expiration ni éviction.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = CACHE_MEMORY_ENTRIES,
+        ttl: float = CACHE_TTL_SECONDS,
+        durable: bool = False,
+        max_bytes: int = CACHE_MEMORY_MAX_BYTES,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory_bytes = 0
+        self.durable = durable
+        self.ttl = float("inf") if durable else ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at >= time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                CACHE_LOOKUPS.labels(self.namespace, "memory_hit").inc()
+                return value
+            self._forget(key)
+
+        loop = asyncio.get_running_loop()
+        if self.durable:
+            raw = await loop.run_in_executor(None, get_store().get_durable, self.namespace, key)
+        else:
+            raw = await loop.run_in_executor(None, get_store().get, self.namespace, key)
+        if raw is None:
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.namespace, "miss").inc()
+            return None
+        value = json.loads(raw)
+        self._remember(key, value, len(raw))
+        self.disk_hits += 1
+        CACHE_LOOKUPS.labels(self.namespace, "disk_hit").inc()
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._remember(key, value, len(raw))
+        loop = asyncio.get_running_loop()
+        if self.durable:
+            await loop.run_in_executor(None, get_store().set_durable, self.namespace, key, raw)
+        else:
+            await loop.run_in_executor(None, get_store().set, self.namespace, key, raw, self.ttl)
+
+    def _remember(self, key: str, value: Any, size: int) -> None:
+        self._forget(key)
+        if size > self.max_bytes:
+            return
+        self._memory[key] = (value, time.time() + self.ttl, size)
+        self._memory_bytes += size
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _forget(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
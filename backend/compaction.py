@@ -0,0 +1,89 @@
+import os
+import re
+import json
+from typing import List
+
+# --- CONFIGURATION ---
+SOURCE_TOKEN_BUDGET = int(os.getenv("FLASHLIGHT_SOURCE_TOKEN_BUDGET", "1500"))
+# Approximation courante pour les modèles Gemini/GPT : ~4 caractères par token.
+CHARS_PER_TOKEN = 4
+
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "nav", "footer", "header", "aside", "form", "iframe")
+MAIN_CONTENT_XPATH = "//main | //article | //*[@role='main']"
+REPO_FIELDS = ("name", "language", "languages", "description", "topics", "stargazers_count", "pushed_at", "readme")
+
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Coupe le texte au dernier espace avant la limite de tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip()
+
+
+def dedupe_lines(lines: List[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for line in lines:
+        key = line.casefold()
+        if line and key not in seen:
+            seen.add(key)
+            unique.append(line)
+    return unique
+
+
+def compact_github_repos(raw: str) -> str:
+    """Réduit la liste JSON des dépôts (/users/{u}/repos ou github_collector) aux champs utiles, une ligne par dépôt."""
+    repos = json.loads(raw)
+    lines = []
+    for repo in repos:
+        if not isinstance(repo, dict):
+            continue
+        projected = {field: repo.get(field) for field in REPO_FIELDS if repo.get(field) not in (None, "", [])}
+        lines.append(json.dumps(projected, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(dedupe_lines(lines))
+
+
+def extract_main_text(html: str) -> str:
+    """Extrait le contenu principal d'une page HTML en supprimant la navigation et le code."""
+    import lxml.html
+    from lxml import etree
+
+    try:
+        tree = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return ""
+    etree.strip_elements(tree, etree.Comment, *BOILERPLATE_TAGS, with_tail=False)
+    main_nodes = tree.xpath(MAIN_CONTENT_XPATH)
+    roots = main_nodes or [tree]
+    lines = []
+    for root in roots:
+        for text in root.itertext():
+            line = _WHITESPACE.sub(" ", text).strip()
+            if line:
+                lines.append(line)
+    return "\n".join(dedupe_lines(lines))
+
+
+def compact_source(platform: str, raw: str, max_tokens: int = SOURCE_TOKEN_BUDGET) -> str:
+    """Étape de compaction entre la récupération et le résumé : projection, nettoyage, dédoublonnage, troncature."""
+    if platform == "GitHub":
+        try:
+            text = compact_github_repos(raw)
+        except (json.JSONDecodeError, TypeError):
+            text = raw
+    elif platform in ("Personal Website", "Hugging Face"):
+        text = extract_main_text(raw)
+    else:
+        text = "\n".join(dedupe_lines([line.strip() for line in raw.splitlines()]))
+
+    compacted = truncate_to_budget(text, max_tokens)
+    print(f"Compaction {platform}: {estimate_tokens(raw)} -> {estimate_tokens(compacted)} tokens")
+    return compacted
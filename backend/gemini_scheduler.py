@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import random
+import asyncio
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from cache import sha256_hex
+from compaction import estimate_tokens
+from metrics import record_gemini_call
+
+# --- CONFIGURATION ---
+GEMINI_MAX_CONCURRENCY = int(os.getenv("FLASHLIGHT_GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("FLASHLIGHT_GEMINI_RPM", "1000"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("FLASHLIGHT_GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("FLASHLIGHT_GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE = float(os.getenv("FLASHLIGHT_GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_MAX = float(os.getenv("FLASHLIGHT_GEMINI_BACKOFF_MAX", "30.0"))
+
+
+
+# google.generativeai coûte près d'une seconde à importer : il n'est chargé qu'au premier
+# appel ou par le préchauffage du lifespan, jamais à l'import de l'application.
+@lru_cache(maxsize=1)
+def retryable_errors() -> Tuple[type, ...]:
+    from google.api_core import exceptions as google_exceptions
+
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+
+
+@lru_cache(maxsize=1)
+def configure_genai() -> Any:
+    import google.generativeai as genai
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if api_key:
+        genai.configure(api_key=api_key)
+    else:
+        print("Critical error during Google API configuration: The GOOGLE_API_KEY environment variable is not set.")
+    return genai
+
+
+class TokenBucket:
+    """Seau à jetons rechargé en continu ; `acquire` attend que la quantité demandée soit disponible."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(float(amount), self.capacity)
+        # Le verrou est gardé pendant l'attente pour servir les appels dans l'ordre d'arrivée.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class SharedStream:
+    """Flux Gemini partagé : chaque abonné relit les fragments déjà reçus, puis suit les suivants.
+
+    L'appel amont est annulé quand le dernier abonné se désabonne avant la fin.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.task: Optional[asyncio.Future] = None
+        self.done = False
+        self.abandoned = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self, _: Any = None) -> None:
+        self.done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                changed = self._changed
+                while position < len(self.chunks):
+                    position += 1
+                    yield self.chunks[position - 1]
+                if self.done:
+                    break
+                await changed.wait()
+            if not self.task.cancelled() and self.task.exception() is not None:
+                raise self.task.exception()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.done:
+                self.abandoned = True
+                self.task.cancel()
+
+
+class GeminiScheduler:
+    """Point de passage unique des appels Gemini : modèles réutilisés, quotas, reprises et coalescence."""
+
+    def __init__(
+        self,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        requests_per_minute: int = GEMINI_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = GEMINI_TOKENS_PER_MINUTE,
+        max_retries: int = GEMINI_MAX_RETRIES,
+    ):
+        self.max_retries = max_retries
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._models: Dict[str, Any] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._in_flight_streams: Dict[str, SharedStream] = {}
+        self.coalesced = 0
+        self.retries = 0
+
+    def model(self, name: str) -> Any:
+        if name not in self._models:
+            self._models[name] = configure_genai().GenerativeModel(name)
+        return self._models[name]
+
+    def warm_up(self, model_name: str) -> None:
+        """Importe et configure le client Gemini, puis crée le modèle (appelé hors de la boucle d'événements)."""
+        retryable_errors()
+        self.model(model_name)
+
+    async def _acquire(self, parts: List[str]) -> None:
+        await self._requests.acquire(1)
+        await self._tokens.acquire(sum(estimate_tokens(part) for part in parts))
+
+    def _record_usage(self, model_name: str, parts: List[str], usage, output_text: str) -> None:
+        """Enregistre les tokens réels si la réponse les fournit, sinon une estimation."""
+        input_tokens = getattr(usage, "prompt_token_count", None) or sum(estimate_tokens(part) for part in parts)
+        output_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(output_text)
+        record_gemini_call(model_name, "ok", input_tokens, output_tokens)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt))
+
+    async def _generate_with_retries(self, model_name: str, parts: List[str], generation_config: Optional[dict]) -> str:
+        attempt = 0
+        while True:
+            await self._acquire(parts)
+            try:
+                async with self._concurrency:
+                    response = await self.model(model_name).generate_content_async(
+                        parts, generation_config=generation_config
+                    )
+                self._record_usage(model_name, parts, getattr(response, "usage_metadata", None), response.text)
+                return response.text
+            except retryable_errors() as e:
+                if attempt >= self.max_retries:
+                    record_gemini_call(model_name, "error")
+                    raise
+                record_gemini_call(model_name, "retry")
+                delay = self._backoff(attempt)
+                print(f"Warning: Gemini call failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def generate(self, model_name: str, parts: List[str], generation_config: Optional[dict] = None) -> str:
+        """Génère une réponse complète ; les appels identiques déjà en cours partagent le même appel amont."""
+        key = sha256_hex(model_name, json.dumps(generation_config, sort_keys=True), *parts)
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.ensure_future(self._generate_with_retries(model_name, parts, generation_config))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _stream_with_retries(
+        self, model_name: str, parts: List[str], generation_config: Optional[dict], shared: "SharedStream"
+    ) -> None:
+        """Alimente `shared`. Les reprises ne sont possibles qu'avant le premier fragment reçu."""
+        attempt = 0
+        while True:
+            await self._acquire(parts)
+            usage = None
+            try:
+                async with self._concurrency:
+                    response = await self.model(model_name).generate_content_async(
+                        parts, generation_config=generation_config, stream=True
+                    )
+                    async for chunk in response:
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        shared.append(chunk.text)
+                self._record_usage(model_name, parts, usage, "".join(shared.chunks))
+                return
+            except retryable_errors() as e:
+                if shared.chunks or attempt >= self.max_retries:
+                    record_gemini_call(model_name, "error")
+                    raise
+                record_gemini_call(model_name, "retry")
+                delay = self._backoff(attempt)
+                print(f"Warning: Gemini stream failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def generate_stream(
+        self, model_name: str, parts: List[str], generation_config: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        """Génère une réponse en streaming ; les appels identiques déjà en cours s'abonnent au même flux amont."""
+        key = sha256_hex("stream", model_name, json.dumps(generation_config, sort_keys=True), *parts)
+        shared = self._in_flight_streams.get(key)
+        if shared is not None and not shared.abandoned:
+            self.coalesced += 1
+        else:
+            shared = SharedStream()
+            shared.task = asyncio.ensure_future(
+                self._stream_with_retries(model_name, parts, generation_config, shared)
+            )
+            shared.task.add_done_callback(shared.close)
+            shared.task.add_done_callback(lambda _: self._in_flight_streams.pop(key, None))
+            self._in_flight_streams[key] = shared
+        async for chunk in shared.subscribe():
+            yield chunk
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight) + len(self._in_flight_streams),
+            "cached_models": len(self._models),
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+        }
+
+
+gemini_scheduler = GeminiScheduler()
@@ -0,0 +1,205 @@
+import os
+import re
+import json
+import math
+import time
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from compaction import REPO_FIELDS, SOURCE_TOKEN_BUDGET, estimate_tokens, truncate_to_budget
+from http_client import fetch
+
+# --- CONFIGURATION ---
+GITHUB_API = "https://api.github.com"
+GITHUB_MAX_PAGES = int(os.getenv("FLASHLIGHT_GITHUB_MAX_PAGES", "5"))
+GITHUB_DETAIL_BATCH = int(os.getenv("FLASHLIGHT_GITHUB_DETAIL_BATCH", "6"))
+GITHUB_README_TOKENS = int(os.getenv("FLASHLIGHT_GITHUB_README_TOKENS", "120"))
+# Requêtes gardées en réserve : en dessous, on se contente de la liste des dépôts déjà obtenue.
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("FLASHLIGHT_GITHUB_RATE_LIMIT_RESERVE", "50"))
+# Les dépôts sans activité depuis plus longtemps n'apportent presque plus de signal.
+GITHUB_STALE_DAYS = int(os.getenv("FLASHLIGHT_GITHUB_STALE_DAYS", str(4 * 365)))
+RECENCY_HALF_LIFE_DAYS = 365
+# Coût prévu des détails d'un dépôt (extrait de README et langages), pour dimensionner les lots.
+DETAIL_TOKENS_ESTIMATE = GITHUB_README_TOKENS + 30
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+_README_NOISE = re.compile(r"^\s*(\[!\[|!\[|<img|<p align|<a href|---|===|```)")
+
+
+class RateLimit:
+    """Suit le quota GitHub annoncé par `X-RateLimit-Remaining`, partagé par toutes les analyses en cours."""
+
+    def __init__(self, reserve: int = GITHUB_RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+    def update(self, headers: httpx.Headers) -> None:
+        if "X-RateLimit-Remaining" in headers:
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+            self.reset_at = float(headers.get("X-RateLimit-Reset", 0))
+
+    def allows(self, cost: int) -> bool:
+        """Réserve `cost` requêtes si le quota le permet (le décompte est corrigé par la réponse suivante)."""
+        if self.remaining is None or time.time() >= self.reset_at:
+            return True
+        if self.remaining - cost < self.reserve:
+            return False
+        self.remaining -= cost
+        return True
+
+
+rate_limit = RateLimit()
+
+
+async def _get(url: str, headers: Optional[Dict[str, str]] = None) -> tuple:
+    try:
+        text, response_headers = await fetch(url, headers)
+    except httpx.HTTPStatusError as e:
+        rate_limit.update(e.response.headers)
+        raise
+    rate_limit.update(response_headers)
+    return text, response_headers
+
+
+def _pushed_at(repo: dict) -> Optional[datetime]:
+    """Date du dernier push, ou None si l'API ne la donne pas (dépôt vide : `"pushed_at": null`)."""
+    value = repo.get("pushed_at")
+    if not isinstance(value, str):
+        return None
+    try:
+        pushed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return pushed if pushed.tzinfo else pushed.replace(tzinfo=timezone.utc)
+
+
+def repo_score(repo: dict, now: Optional[datetime] = None) -> float:
+    """Popularité (étoiles, échelle log) pondérée par l'activité récente (demi-vie d'un an)."""
+    now = now or datetime.now(timezone.utc)
+    pushed = _pushed_at(repo)
+    # Sans date connue, le dépôt est traité comme inactif.
+    age_days = max((now - pushed).days, 0) if pushed else GITHUB_STALE_DAYS
+    recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    return (1 + math.log1p(repo.get("stargazers_count") or 0)) * (0.25 + recency)
+
+
+def _is_stale(repo: dict, now: datetime) -> bool:
+    pushed = _pushed_at(repo)
+    return pushed is None or (now - pushed).days > GITHUB_STALE_DAYS
+
+
+async def list_repos(username: str) -> List[dict]:
+    """Parcourt les pages de /users/{u}/repos (les plus récemment modifiés d'abord) en suivant l'en-tête Link.
+
+    La pagination s'arrête dès qu'une page se termine par un dépôt inactif, ou quand le quota
+    restant doit être préservé.
+    """
+    now = datetime.now(timezone.utc)
+    url = f"{GITHUB_API}/users/{username}/repos?per_page=100&sort=pushed&type=owner"
+    repos = []
+    for page in range(GITHUB_MAX_PAGES):
+        if page > 0 and not rate_limit.allows(1):
+            print(f"GitHub {username}: rate limit reserve reached, stopping after {page} page(s)")
+            break
+        text, headers = await _get(url)
+        batch = json.loads(text)
+        repos.extend(batch)
+        match = _NEXT_LINK.search(headers.get("Link", ""))
+        # Tri par date de push : si le dernier dépôt de la page est inactif, les pages suivantes aussi.
+        if not match or not batch or _is_stale(batch[-1], now):
+            break
+        url = match.group(1)
+    return repos
+
+
+def _readme_excerpt(markdown: str) -> str:
+    lines = [line.strip().lstrip("#").strip() for line in markdown.splitlines() if not _README_NOISE.match(line)]
+    return truncate_to_budget(" ".join(line for line in lines if line), GITHUB_README_TOKENS)
+
+
+async def _languages(full_name: str) -> Optional[List[str]]:
+    try:
+        text, _ = await _get(f"{GITHUB_API}/repos/{full_name}/languages")
+    except httpx.HTTPError:
+        return None
+    sizes = json.loads(text)
+    total = sum(sizes.values()) or 1
+    return [f"{name} {round(100 * size / total)}%" for name, size in sorted(sizes.items(), key=lambda item: -item[1])[:4]]
+
+
+async def _readme(full_name: str) -> Optional[str]:
+    try:
+        text, _ = await _get(f"{GITHUB_API}/repos/{full_name}/readme", {"Accept": "application/vnd.github.raw"})
+    except httpx.HTTPError:
+        return None
+    return _readme_excerpt(text) or None
+
+
+def _project(repo: dict) -> dict:
+    return {field: repo.get(field) for field in REPO_FIELDS if repo.get(field) not in (None, "", [])}
+
+
+def _repo_tokens(repo: dict) -> int:
+    # Une ligne JSON par dépôt dans la source compactée (compact_github_repos), saut de ligne compris.
+    return estimate_tokens(json.dumps(_project(repo), ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+async def _describe(repo: dict) -> dict:
+    described = _project(repo)
+    full_name = repo.get("full_name")
+    # Deux requêtes par dépôt : elles ne sont faites que si le quota le permet.
+    if full_name and rate_limit.allows(2):
+        languages, readme = await asyncio.gather(_languages(full_name), _readme(full_name))
+        if languages:
+            described["languages"] = languages
+        if readme:
+            described["readme"] = readme
+    return described
+
+
+async def collect_github_profile(username: str, max_tokens: int = SOURCE_TOKEN_BUDGET) -> str:
+    """Rassemble les dépôts les plus significatifs d'un compte GitHub, enrichis de leurs langages et README.
+
+    Les forks et dépôts archivés sont écartés, les autres classés par étoiles et activité récente,
+    puis détaillés par lots concurrents tant qu'ils tiennent dans le budget de tokens de la source. Retourne
+    une liste JSON de dépôts, dans l'ordre du classement, que `compact_source` sait réduire.
+    """
+    repos = [repo for repo in await list_repos(username) if not repo.get("fork") and not repo.get("archived")]
+    now = datetime.now(timezone.utc)
+    ranked = sorted(repos, key=lambda repo: repo_score(repo, now), reverse=True)
+
+    described = []
+    used_tokens = 0
+    position = 0
+    # Le budget est vérifié dépôt par dépôt : aucun quota n'est dépensé pour un dépôt qui ne tiendrait
+    # pas, et la source n'est jamais tronquée au milieu d'une ligne JSON par `compact_source`.
+    while position < len(ranked) and used_tokens + _repo_tokens(ranked[position]) <= max_tokens:
+        batch = []
+        projected = used_tokens
+        for repo in ranked[position:position + GITHUB_DETAIL_BATCH]:
+            projected += _repo_tokens(repo) + DETAIL_TOKENS_ESTIMATE
+            if batch and projected > max_tokens:
+                break
+            batch.append(repo)
+        position += len(batch)
+
+        full = False
+        for repo, details in zip(batch, await asyncio.gather(*(_describe(repo) for repo in batch))):
+            # Un dépôt dont les détails dépassent le budget est gardé sans eux s'il tient encore.
+            for candidate in (details, _project(repo)):
+                cost = _repo_tokens(candidate)
+                if used_tokens + cost <= max_tokens:
+                    described.append(candidate)
+                    used_tokens += cost
+                    break
+            else:
+                full = True
+                break
+        if full:
+            break
+    print(f"GitHub {username}: {len(described)}/{len(repos)} repos described, ~{used_tokens} tokens")
+    return json.dumps(described, ensure_ascii=False)
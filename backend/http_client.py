@@ -0,0 +1,130 @@
+import os
+import asyncio
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from cache import TieredCache
+from metrics import UPSTREAM_RESPONSES
+
+# --- CONFIGURATION ---
+HTTP_MAX_CONNECTIONS = int(os.getenv("FLASHLIGHT_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("FLASHLIGHT_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("FLASHLIGHT_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_PER_HOST = int(os.getenv("FLASHLIGHT_HTTP_PER_HOST", "8"))
+HTTP_TIMEOUT = float(os.getenv("FLASHLIGHT_HTTP_TIMEOUT", "10"))
+# Les réponses revalidées restent utilisables longtemps : seul le serveur décide si elles ont changé.
+HTTP_CACHE_TTL_SECONDS = int(os.getenv("FLASHLIGHT_HTTP_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# En-têtes conservés avec le corps : une réponse 304 ne les renvoie pas toujours (pagination GitHub).
+CACHED_HEADERS = ("Link",)
+
+# User-Agent est crucial pour des sites comme Instagram
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Libellés Prometheus des hôtes connus ; tout autre hôte (URL saisie par le candidat) compte comme « portfolio ».
+UPSTREAM_LABELS = {"github.com": "github", "githubusercontent.com": "github", "huggingface.co": "huggingface",
+                   "instagram.com": "instagram"}
+
+_client: Optional[httpx.AsyncClient] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+response_cache = TieredCache("http", ttl=HTTP_CACHE_TTL_SECONDS)
+
+
+def start_client() -> httpx.AsyncClient:
+    """Crée le client HTTP partagé par toute l'application (appelé dans le lifespan FastAPI)."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=HTTP_TIMEOUT,
+            headers=DEFAULT_HEADERS,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_limits.clear()
+
+
+def get_client() -> httpx.AsyncClient:
+    return _client if _client is not None else start_client()
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).hostname or ""
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST)
+    return _host_limits[host]
+
+
+def upstream_label(host: str) -> str:
+    """Ramène un hôte à un ensemble fixe de libellés, pour ne pas créer une série par domaine de portfolio."""
+    for domain, label in UPSTREAM_LABELS.items():
+        if host == domain or host.endswith("." + domain):
+            return label
+    return "portfolio"
+
+
+def _auth_headers(url: str) -> Dict[str, str]:
+    token = os.getenv("GITHUB_TOKEN")
+    if token and urlsplit(url).hostname == "api.github.com":
+        return {"Authorization": f"Bearer {token}"}
+    return {}
+
+
+async def fetch(url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[str, httpx.Headers]:
+    """Récupère le contenu d'une URL via le client partagé, en revalidant la copie locale avec ETag/Last-Modified.
+
+    Une réponse 304 renvoie le corps déjà stocké sans retélécharger la page (et ne compte pas
+    dans le quota de l'API GitHub pour les requêtes authentifiées). Retourne aussi les en-têtes
+    de la réponse, complétés par ceux conservés dans le cache.
+    """
+    request_headers = {**_auth_headers(url), **(headers or {})}
+    cached = await response_cache.get(url)
+    if cached:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    upstream = upstream_label(urlsplit(url).hostname or "")
+    async with _host_limit(url):
+        try:
+            response = await get_client().get(url, headers=request_headers)
+        except httpx.RequestError:
+            UPSTREAM_RESPONSES.labels(upstream, "error").inc()
+            raise
+    UPSTREAM_RESPONSES.labels(upstream, str(response.status_code)).inc()
+
+    if response.status_code == 304 and cached:
+        response_headers = httpx.Headers(cached.get("headers") or {})
+        response_headers.update(response.headers)
+        return cached["text"], response_headers
+    response.raise_for_status()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        kept = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        await response_cache.set(
+            url, {"etag": etag, "last_modified": last_modified, "text": response.text, "headers": kept}
+        )
+    return response.text, response.headers
+
+
+async def fetch_text(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+    text, _ = await fetch(url, headers)
+    return text
@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# --- CONFIGURATION ---
+JOBS_DB_PATH = os.getenv("FLASHLIGHT_JOBS_DB", os.path.join(os.path.dirname(__file__), "flashlight_jobs.sqlite3"))
+JOBS_UPLOAD_DIR = os.getenv("FLASHLIGHT_JOBS_UPLOAD_DIR", os.path.join(os.path.dirname(__file__), "job_uploads"))
+JOBS_WORKERS = int(os.getenv("FLASHLIGHT_JOBS_WORKERS", "4"))
+JOBS_MAX_PENDING = int(os.getenv("FLASHLIGHT_JOBS_MAX_PENDING", "500"))
+# Chaque processus signale sa présence à cette fréquence ; les jobs d'un processus silencieux depuis
+# plus de JOBS_LEASE_SECONDS (arrêté, tué, redémarré) sont repris par un autre.
+JOBS_HEARTBEAT_SECONDS = float(os.getenv("FLASHLIGHT_JOBS_HEARTBEAT_SECONDS", "10"))
+JOBS_LEASE_SECONDS = float(os.getenv("FLASHLIGHT_JOBS_LEASE_SECONDS", "30"))
+
+# Signature de main.analysis_events : (cv_path, cv_sha256, sources, remove_cv) -> événements (nom, données)
+PipelineRunner = Callable[[str, str, dict, bool], AsyncIterator[Tuple[str, dict]]]
+
+
+class JobStore:
+    """Table SQLite des jobs d'analyse ; elle survit aux redémarrages du serveur."""
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                cv_path TEXT NOT NULL,
+                cv_sha256 TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                owner TEXT
+            )"""
+        )
+        # Bases créées avant l'ajout de `owner` (jeton du processus qui détient le job)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            try:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            except sqlite3.OperationalError as e:
+                # Migration faite en même temps par un autre worker
+                if "duplicate column" not in str(e):
+                    raise
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_owners (owner TEXT PRIMARY KEY, heartbeat REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def create(self, job_id: str, cv_path: str, cv_sha256: str, sources: dict, owner: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, cv_path, cv_sha256, sources, progress, owner) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, now, now, cv_path, cv_sha256, json.dumps(sources), json.dumps(new_progress()), owner),
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        for name in ("progress", "result"):
+            if name in fields:
+                fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip((column[0] for column in cursor.description), row))
+        for name in ("sources", "progress", "result"):
+            if job[name] is not None:
+                job[name] = json.loads(job[name])
+        return job
+
+    def heartbeat(self, owner: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO job_owners VALUES (?, ?)", (owner, now))
+            self._conn.execute("DELETE FROM job_owners WHERE heartbeat < ?", (now - 10 * JOBS_LEASE_SECONDS,))
+            self._conn.commit()
+
+    def release(self, owner: str) -> None:
+        """Retire un processus qui s'arrête : ses jobs inachevés peuvent être repris sans attendre le bail."""
+        with self._lock:
+            self._conn.execute("DELETE FROM job_owners WHERE owner = ?", (owner,))
+            self._conn.commit()
+
+    def orphaned(self) -> List[Tuple[str, Optional[str]]]:
+        """Jobs en file ou en cours dont le propriétaire n'a pas signalé sa présence depuis JOBS_LEASE_SECONDS."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running') AND (owner IS NULL OR owner NOT IN "
+                "(SELECT owner FROM job_owners WHERE heartbeat >= ?)) ORDER BY created_at",
+                (time.time() - JOBS_LEASE_SECONDS,),
+            ).fetchall()
+
+    def claim(self, job_id: str, previous_owner: Optional[str], owner: str) -> bool:
+        """Reprend un job orphelin ; l'UPDATE conditionnel garantit qu'un seul processus l'obtient."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET owner = ?, status = 'queued', progress = ?, updated_at = ? "
+                "WHERE id = ? AND owner IS ? AND status IN ('queued', 'running')",
+                (owner, json.dumps(new_progress()), time.time(), job_id, previous_owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def start_running(self, job_id: str, owner: str) -> bool:
+        """Passe le job à `running` s'il appartient toujours à `owner`."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', progress = ?, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status IN ('queued', 'running')",
+                (json.dumps(new_progress()), time.time(), job_id, owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def results(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT result FROM jobs WHERE result IS NOT NULL").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count_pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def new_progress() -> Dict[str, Any]:
+    return {"cv_extracted": False, "sources_fetched": [], "plan": None, "summaries_done": [], "skills_parsed": 0}
+
+
+def record_event(progress: Dict[str, Any], event: str, data: dict) -> bool:
+    """Met à jour la progression d'un job ; retourne False pour les événements qui ne méritent pas d'écriture."""
+    if event == "cv_extracted":
+        progress["cv_extracted"] = True
+    elif event == "source_fetched":
+        progress["sources_fetched"].append({"platform": data["platform"], "ok": data["ok"]})
+    elif event == "plan":
+        progress["plan"] = data["mode"]
+    elif event == "summary_done":
+        progress["summaries_done"].append({"platform": data["platform"], "ok": data["ok"]})
+    elif event == "skill":
+        progress["skills_parsed"] += 1
+        return False
+    return True
+
+
+def remove_cv(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class JobQueue:
+    """Pool borné de workers asyncio qui exécutent le pipeline pour les jobs stockés dans `JobStore`."""
+
+    def __init__(self, runner: PipelineRunner, workers: int = JOBS_WORKERS, max_pending: int = JOBS_MAX_PENDING):
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        # Jeton propre à ce processus (un pid peut être réutilisé après un redémarrage).
+        self.owner = f"w-{uuid.uuid4().hex}"
+        self.store: Optional[JobStore] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def _db(self, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: method(*args, **kwargs))
+
+    async def start(self) -> None:
+        """Ouvre la table des jobs, reprend les jobs orphelins et démarre les workers.
+
+        Plusieurs processus peuvent partager la base : chacun signale sa présence et reprend
+        périodiquement les jobs des processus silencieux, en les réclamant un par un.
+        """
+        os.makedirs(JOBS_UPLOAD_DIR, exist_ok=True)
+        self.store = JobStore()
+        self._queue = asyncio.Queue()
+        await self._db(self.store.heartbeat, self.owner)
+        await self._recover()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._supervise()))
+
+    async def _recover(self) -> None:
+        resumed = 0
+        for job_id, previous_owner in await self._db(self.store.orphaned):
+            if await self._db(self.store.claim, job_id, previous_owner, self.owner):
+                self._queue.put_nowait(job_id)
+                resumed += 1
+        if resumed:
+            print(f"Resumed {resumed} interrupted analysis job(s)")
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(JOBS_HEARTBEAT_SECONDS)
+            try:
+                await self._db(self.store.heartbeat, self.owner)
+                await self._recover()
+            except sqlite3.Error as e:
+                print(f"Error while checking analysis jobs: {e}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.store is not None:
+            self.store.release(self.owner)
+            self.store.close()
+            self.store = None
+
+    async def submit(self, cv_path: str, cv_sha256: str, sources: dict) -> str:
+        if await self._db(self.store.count_pending) >= self.max_pending:
+            os.unlink(cv_path)
+            raise HTTPException(status_code=503, detail="Too many analysis jobs are pending. Please retry later.")
+        job_id = uuid.uuid4().hex
+        await self._db(self.store.create, job_id, cv_path, cv_sha256, sources, self.owner)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self._db(self.store.get, job_id)
+        if job is None:
+            return None
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "progress": job["progress"],
+            "result": job["result"],
+            "error": job["error"],
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"Error running analysis job {job_id}: {e}")
+                await self._db(self.store.update, job_id, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        # Un autre processus a pu reprendre le job (bail expiré) : il n'est alors pas exécuté ici.
+        if not await self._db(self.store.start_running, job_id, self.owner):
+            return
+        job = await self._db(self.store.get, job_id)
+        if not os.path.exists(job["cv_path"]):
+            # Le CV a déjà été consommé par une exécution interrompue.
+            await self._db(self.store.update, job_id, status="failed", error="The uploaded CV is no longer available.")
+            return
+
+        progress = new_progress()
+        # Le CV reste sur disque jusqu'à la fin du job : un redémarrage pendant l'analyse le relance.
+        try:
+            async for event, data in self.runner(job["cv_path"], job["cv_sha256"], job["sources"], remove_cv=False):
+                if event == "profile":
+                    await self._db(self.store.update, job_id, status="done", progress=progress, result=data)
+                elif record_event(progress, event, data):
+                    await self._db(self.store.update, job_id, progress=progress)
+        except HTTPException as e:
+            await self._db(self.store.update, job_id, status="failed", progress=progress, error=str(e.detail))
+        except Exception:
+            remove_cv(job["cv_path"])
+            raise
+        remove_cv(job["cv_path"])
@@ -1,23 +1,120 @@
 import os
 import json
-import re
+import math
+import time
 import asyncio
-from typing import Optional
+import importlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
 
-import google.generativeai as genai
-import PyPDF2 as pdf
 import httpx
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException
+from fastapi import Body, FastAPI, File, Form, Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from batch import BATCH_CONCURRENCY, Candidate, empty_sources, iter_batch, parse_candidates_csv
+from cache import TieredCache, close_store, get_store, sha256_hex
+from compaction import compact_source, estimate_tokens
+from gemini_scheduler import gemini_scheduler
+from github_collector import collect_github_profile
+from http_client import close_client, fetch_text, response_cache, start_client
+from jobs import JOBS_UPLOAD_DIR, JobQueue
+from metrics import (
+    TRACE_HEADER,
+    format_server_timing,
+    monitor_event_loop_lag,
+    render_metrics,
+    stage_timer,
+    start_trace,
+)
+from pdf_extraction import extract_text_from_pdf_path, shutdown_pool, spool_upload, warm_up_pool
+from planner import SUMMARY_TOKENS_ESTIMATE, is_oversized, log_plan, plan_synthesis
+from profile_parser import PROFILE_SECTIONS, SUMMARY_SECTION, ProfileStreamParser
+from skill_store import CONFIDENCE_WEIGHTS, skill_store
+import wordcloud_renderer
 
 # --- CONFIGURATION INITIALE ---
 load_dotenv()
 
+
+# Modules d'analyse HTML chargés à la demande (compaction, bio Instagram) : préchargés au démarrage.
+HTML_PARSER_MODULES = ("lxml.html", "bs4")
+readiness = {"ready": False, "warmup_seconds": None, "error": None}
+
+
+def load_html_parsers() -> None:
+    for name in HTML_PARSER_MODULES:
+        importlib.import_module(name)
+
+
+async def warm_up() -> None:
+    """Charge en arrière-plan ce que la première requête paierait sinon ; /ready répond 200 une fois terminé."""
+    started = time.perf_counter()
+    try:
+        # Le pool PDF est démarré avant les imports en threads : un fork pendant un import peut bloquer le worker.
+        await warm_up_pool()
+        await asyncio.gather(
+            run_in_threadpool(gemini_scheduler.warm_up, GEMINI_MODEL),
+            run_in_threadpool(load_html_parsers),
+            run_in_threadpool(skill_store.open),
+            run_in_threadpool(get_store),
+        )
+    except Exception as e:
+        print(f"Critical error during warm-up: {e}")
+        readiness["error"] = str(e)
+        return
+    readiness.update(ready=True, warmup_seconds=round(time.perf_counter() - started, 3))
+    print(f"Warm-up done in {readiness['warmup_seconds']:.2f}s")
+
+
+def referenced_profiles() -> List[dict]:
+    """Profils qui peuvent encore être servis avec leur `wordcloud_url` : jobs, index de compétences, cache d'analyses."""
+    profiles = skill_store.profiles()
+    if job_queue.store is not None:
+        profiles.extend(job_queue.store.results())
+    profiles.extend(json.loads(raw) for raw in get_store().values(analysis_cache.namespace))
+    return profiles
+
+
+async def prune_wordclouds() -> None:
+    while True:
+        await asyncio.sleep(wordcloud_renderer.WORDCLOUD_PRUNE_SECONDS)
+        try:
+            removed = await run_in_threadpool(
+                lambda: wordcloud_renderer.prune_frequencies(referenced_profiles())
+            )
+        except Exception as e:
+            print(f"Error pruning word cloud frequencies: {e}")
+            continue
+        if removed:
+            print(f"Pruned {removed} unreferenced word cloud frequency map(s)")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_client()
+    await job_queue.start()
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    warm_up_task = asyncio.create_task(warm_up())
+    prune_task = asyncio.create_task(prune_wordclouds())
+    yield
+    prune_task.cancel()
+    warm_up_task.cancel()
+    lag_monitor.cancel()
+    await job_queue.stop()
+    await close_client()
+    shutdown_pool()
+    wordcloud_renderer.shutdown_pool()
+    skill_store.close()
+    close_store()
+
+
 app = FastAPI(
     title="Flashlight API",
     description="API to analyze resumes and profiles to uncover hidden skills.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -26,15 +123,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-try:
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("The GOOGLE_API_KEY environment variable is not set.")
-    genai.configure(api_key=api_key)
-except Exception as e:
-    print(f"Critical error during Google API configuration: {e}")
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Si le client envoie `X-Flashlight-Trace: 1`, renvoie la durée de chaque étape dans `Server-Timing`.
+
+    Les réponses en streaming envoient leurs en-têtes avant la fin du pipeline : la trace y est vide.
+    """
+    if request.headers.get(TRACE_HEADER) != "1":
+        return await call_next(request)
+    trace = start_trace()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = format_server_timing(trace)
+    return response
+
+GEMINI_MODEL = "gemini-2.5-flash"
 
 # --- PROMPTS (inchangés) ---
 SUMMARY_PROMPT_TEMPLATE = """
@@ -79,38 +185,45 @@ Your analysis must be insightful, structured, and presented in a specific JSON f
 ```
 """
 
+# Ajouté au prompt final quand une réponse tronquée ne contenait pas toutes les sections.
+SECTION_PROMPT_SUFFIX = """
+IMPORTANT: Output ONLY a JSON object containing the following key(s): {sections}. Omit every other key of the structure above.
+"""
+
+# Toute modification des prompts ou du modèle invalide les résultats mis en cache.
+PROMPT_VERSION = sha256_hex(GEMINI_MODEL, SUMMARY_PROMPT_TEMPLATE, FINAL_JSON_PROMPT, SECTION_PROMPT_SUFFIX)[:16]
+SUMMARY_PROMPT_VERSION = sha256_hex(GEMINI_MODEL, SUMMARY_PROMPT_TEMPLATE)[:16]
+
+analysis_cache = TieredCache("analysis")
+summary_cache = TieredCache("summaries", max_entries=1024)
+
 # --- FONCTIONS HELPERS ASYNCHRONES ---
 
-async def get_external_data(url: str, client: httpx.AsyncClient) -> str:
-    """Récupère le contenu brut d'une URL de manière asynchrone, en suivant les redirections."""
+async def get_external_data(url: str) -> str:
+    """Récupère le contenu brut d'une URL via le client HTTP partagé, en suivant les redirections."""
     if not url:
         return ""
     try:
         if not url.startswith(("http://", "https://")):
             url = "https://" + url
-        
-        # User-Agent est crucial pour des sites comme Instagram
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = await client.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return response.text
+        return await fetch_text(url)
     except httpx.RequestError as e:
         print(f"Warning: Could not fetch data from {url}. Error: {e}")
         return ""
 
 # NOUVEAU : Fonction spécifique pour extraire la bio Instagram
-async def get_instagram_bio(username: str, client: httpx.AsyncClient) -> str:
+async def get_instagram_bio(username: str) -> str:
     """Extrait la biographie d'un profil Instagram à partir des métadonnées de la page."""
     if not username:
         return ""
     try:
         url = f"https://www.instagram.com/{username}/"
-        html_content = await get_external_data(url, client)
+        html_content = await get_external_data(url)
         if not html_content:
             return ""
         
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html_content, "lxml")
         # La bio est souvent dans la meta tag 'description'
         meta_tag = soup.find("meta", attrs={"name": "description"})
@@ -127,42 +240,218 @@ async def get_instagram_bio(username: str, client: httpx.AsyncClient) -> str:
         print(f"Warning: Could not extract Instagram bio for {username}. Error: {e}")
         return ""
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    import io
+async def call_gemini_api_stream(prompt: str, content: str) -> AsyncIterator[str]:
+    """Comme call_gemini_api, mais renvoie le texte généré au fil de l'eau."""
     try:
-        pdf_file = io.BytesIO(pdf_bytes)
-        pdf_reader = pdf.PdfReader(pdf_file)
-        return "".join(page.extract_text() for page in pdf_reader.pages if page.extract_text())
+        async for chunk in gemini_scheduler.generate_stream(GEMINI_MODEL, [prompt, content]):
+            yield chunk
     except Exception as e:
-        print(f"Error reading PDF: {e}")
-        raise HTTPException(status_code=400, detail=f"Error reading PDF file: {e}")
+        print(f"Error calling Gemini API: {e}")
+        raise HTTPException(status_code=503, detail=f"Error communicating with the Gemini API: {e}")
 
 async def call_gemini_api(prompt: str, content: str) -> str:
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = await model.generate_content_async([prompt, content])
-        return response.text
+        return await gemini_scheduler.generate(GEMINI_MODEL, [prompt, content])
     except Exception as e:
         print(f"Error calling Gemini API: {e}")
         raise HTTPException(status_code=503, detail=f"Error communicating with the Gemini API: {e}")
 
-def clean_and_parse_json(raw_text: str) -> dict:
-    match = re.search(r"```json\s*(\{.*?\})\s*```", raw_text, re.DOTALL)
-    if match:
-        json_string = match.group(1)
-    else:
-        json_string = raw_text
+async def summarize_profile(platform: str, profile_text: str) -> str:
+    """Résume un profil externe, en réutilisant le résumé déjà produit si le texte nettoyé n'a pas changé."""
+    cache_key = sha256_hex(platform, SUMMARY_PROMPT_VERSION, profile_text)
+    cached = await summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(platform_name=platform, profile_text=profile_text)
+    with stage_timer("summary", platform):
+        summary = await call_gemini_api(prompt, "")
+    await summary_cache.set(cache_key, summary)
+    return summary
+
+def normalize_source(value: Optional[str]) -> str:
+    """Normalise un identifiant de profil ou une URL pour que les variantes équivalentes partagent la même clé.
 
+    Seuls le schéma, l'hôte et les identifiants sont insensibles à la casse : le chemin d'une URL est gardé tel quel.
+    """
+    if not value:
+        return ""
+    value = value.strip()
+    for prefix in ("https://", "http://", "www.", "@"):
+        if value.lower().startswith(prefix):
+            value = value[len(prefix):]
+    host_end = min((i for i in map(value.find, "/?#") if i >= 0), default=len(value))
+    return (value[:host_end].lower() + value[host_end:]).rstrip("/")
+
+def analysis_cache_key(cv_sha256: str, sources: dict) -> str:
+    normalized = json.dumps({name: normalize_source(value) for name, value in sources.items()}, sort_keys=True)
+    return sha256_hex(cv_sha256, normalized, PROMPT_VERSION)
+
+async def fetch_source(platform: str, identifier: str) -> str:
+    with stage_timer("fetch", platform):
+        if platform == "GitHub":
+            try:
+                return await collect_github_profile(identifier)
+            except httpx.RequestError as e:
+                print(f"Warning: Could not fetch GitHub repositories for {identifier}. Error: {e}")
+                return ""
+        if platform == "Hugging Face":
+            return await get_external_data(f"https://huggingface.co/{identifier}")
+        if platform == "Instagram":
+            return await get_instagram_bio(identifier)
+        return await get_external_data(identifier)
+
+async def analysis_events(
+    cv_path: str, cv_sha256: str, sources: dict, remove_cv: bool = True
+) -> AsyncIterator[Tuple[str, dict]]:
+    """Exécute le pipeline d'analyse et produit un événement à la fin de chaque étape.
+
+    `sources` associe un nom de plateforme (ex. "GitHub") à l'identifiant saisi. Le dernier
+    événement est toujours ("profile", profil final). Le fichier `cv_path` est supprimé une
+    fois lu, sauf si `remove_cv` est faux.
+    """
     try:
-        return json.loads(json_string)
-    except json.JSONDecodeError as e:
-        print(f"JSON Decode Error. Raw AI Response:\n{raw_text}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"The AI response was not valid JSON. Error: {e}"
-        )
+        cache_key = analysis_cache_key(cv_sha256, sources)
+        cached = await analysis_cache.get(cache_key)
+        if cached is not None:
+            yield "profile", cached
+            return
+        with stage_timer("pdf_extraction"):
+            extraction = await extract_text_from_pdf_path(cv_path)
+    finally:
+        if remove_cv:
+            os.unlink(cv_path)
+    if not extraction.text:
+        raise HTTPException(status_code=400, detail="Could not extract text from the CV.")
+    yield "cv_extracted", {"pages": extraction.page_count, "characters": len(extraction.text)}
+
+    # Une source trop volumineuse est résumée dès qu'elle est récupérée ; les autres attendent
+    # le plan, qui décide une fois toutes les sources connues.
+    sources_started = time.perf_counter()
+    fetching = {
+        asyncio.ensure_future(fetch_source(platform, identifier)): platform
+        for platform, identifier in sources.items() if identifier
+    }
+    summarizing = {}
+    summaries = {}
+    inline_sources = {}
+    incomplete = False
+    plan = None
+    pending = set(fetching)
+    try:
+        while True:
+            # Le plan est établi dès que toutes les sources sont récupérées, sans attendre les résumés en cours.
+            if plan is None and not any(task in fetching for task in pending):
+                plan = plan_synthesis(
+                    estimate_tokens(extraction.text),
+                    {platform: estimate_tokens(text) for platform, text in inline_sources.items()},
+                    {
+                        platform: estimate_tokens(summaries[platform]) if platform in summaries else SUMMARY_TOKENS_ESTIMATE
+                        for platform in summarizing.values()
+                    },
+                )
+                yield "plan", plan.as_event()
+                for platform in plan.summarize:
+                    summary_task = asyncio.ensure_future(summarize_profile(platform, inline_sources.pop(platform)))
+                    summarizing[summary_task] = platform
+                    pending.add(summary_task)
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task in fetching:
+                    platform = fetching[task]
+                    data = None if task.exception() else task.result()
+                    incomplete = incomplete or data is None
+                    yield "source_fetched", {"platform": platform, "ok": data is not None, "characters": len(data or "")}
+                    with stage_timer("compaction", platform):
+                        profile_text = await run_in_threadpool(compact_source, platform, data) if data else ""
+                    if profile_text and is_oversized(estimate_tokens(profile_text)):
+                        summary_task = asyncio.ensure_future(summarize_profile(platform, profile_text))
+                        summarizing[summary_task] = platform
+                        pending.add(summary_task)
+                    elif profile_text:
+                        inline_sources[platform] = profile_text
+                else:
+                    platform = summarizing[task]
+                    ok = task.exception() is None
+                    incomplete = incomplete or not ok
+                    if ok:
+                        summaries[platform] = task.result()
+                    yield "summary_done", {"platform": platform, "ok": ok, "summary": summaries.get(platform, "")}
+    finally:
+        for task in pending:
+            task.cancel()
+
+    # Ordre stable des sources dans le prompt final, quel que soit l'ordre d'arrivée.
+    ordered = [summaries[platform] for platform in sources if platform in summaries]
+    combined_text = extraction.text + "\n\n--- External Profile Summaries ---\n" + "\n".join(ordered)
+    raw_profiles = [f"[{platform}]\n{inline_sources[platform]}" for platform in sources if platform in inline_sources]
+    if raw_profiles:
+        combined_text += "\n\n--- External Profile Data ---\n" + "\n\n".join(raw_profiles)
+
+    parser = ProfileStreamParser()
+    try:
+        with stage_timer("final_synthesis"):
+            async for chunk in call_gemini_api_stream(FINAL_JSON_PROMPT, combined_text):
+                for category, skill in parser.feed(chunk):
+                    yield "skill", {"category": category, **skill}
+    except HTTPException:
+        # Un flux coupé en cours de route est réparé comme une réponse tronquée.
+        if not parser.started:
+            raise
+        print("Warning: final synthesis stream was interrupted, repairing the partial response")
+
+    with stage_timer("json_parse"):
+        final_json, missing = parser.finish()
+
+    # Une réponse tronquée ou incomplète ne relance que les sections manquantes, jamais tout le pipeline.
+    if missing:
+        print(f"Warning: final synthesis is missing {missing}, re-requesting only these sections")
+        section_parser = ProfileStreamParser()
+        prompt = FINAL_JSON_PROMPT + SECTION_PROMPT_SUFFIX.format(sections=", ".join(missing))
+        try:
+            with stage_timer("section_repair"):
+                async for chunk in call_gemini_api_stream(prompt, combined_text):
+                    for category, skill in section_parser.feed(chunk):
+                        if category in missing:
+                            yield "skill", {"category": category, **skill}
+        except HTTPException as e:
+            print(f"Warning: section re-request failed: {e.detail}")
+        recovered, _ = section_parser.finish()
+        for section in missing:
+            if section in recovered:
+                final_json[section] = recovered[section]
+        missing = [section for section in missing if section not in final_json]
+    if len(missing) == len(PROFILE_SECTIONS):
+        raise HTTPException(status_code=500, detail="The AI response did not contain a usable skill profile.")
+    # Ordre et clés du schéma garantis, même si une section n'a pas pu être récupérée.
+    final_json = {
+        section: final_json.get(section, "" if section == SUMMARY_SECTION else []) for section in PROFILE_SECTIONS
+    }
+
+    # Le nuage de mots n'est dessiné qu'à la première requête sur son URL.
+    frequencies = wordcloud_renderer.skill_frequencies(final_json)
+    if frequencies:
+        digest = await wordcloud_renderer.register_frequencies(frequencies)
+        final_json["wordcloud_url"] = f"/wordcloud/{digest}.png"
+
+    # Un même CV réanalysé remplace le profil précédent dans l'index de recherche.
+    await skill_store.add_profile(cv_sha256, {name: value for name, value in sources.items() if value}, final_json)
+
+    # On ne met pas en cache un profil construit alors qu'une source était indisponible,
+    # ni un profil réparé : la prochaine analyse aura une chance d'obtenir une réponse complète.
+    if not incomplete and not parser.repaired and not missing:
+        await analysis_cache.set(cache_key, final_json)
 
-# --- ENDPOINT PRINCIPAL DE L'API (MODIFIÉ) ---
+    log_plan(plan, [platform for platform in sources if platform in summarizing.values()], time.perf_counter() - sources_started)
+    yield "profile", final_json
+
+job_queue = JobQueue(analysis_events)
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# --- ENDPOINTS DE L'API ---
 
 @app.post("/analyze/")
 async def analyze(
@@ -175,56 +464,196 @@ async def analyze(
     if not os.getenv("GOOGLE_API_KEY"):
         raise HTTPException(status_code=500, detail="Google API key is not configured on the server.")
 
-    cv_content_bytes = await cv_file.read()
-    cv_text = extract_text_from_pdf_bytes(cv_content_bytes)
-    if not cv_text:
-        raise HTTPException(status_code=400, detail="Could not extract text from the CV.")
+    cv_path, cv_sha256 = await spool_upload(cv_file)
+    sources = {
+        "GitHub": github_user,
+        "Hugging Face": huggingface_user,
+        "Personal Website": portfolio_url,
+        "Instagram": instagram_user,
+    }
+    final_json = None
+    async for event, data in analysis_events(cv_path, cv_sha256, sources):
+        if event == "profile":
+            final_json = data
+    return final_json
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    cv_file: UploadFile = File(...),
+    github_user: Optional[str] = Form(None),
+    huggingface_user: Optional[str] = Form(None),
+    portfolio_url: Optional[str] = Form(None),
+    instagram_user: Optional[str] = Form(None),
+):
+    """Même analyse que /analyze/, diffusée en Server-Sent Events au fur et à mesure des étapes."""
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise HTTPException(status_code=500, detail="Google API key is not configured on the server.")
+
+    cv_path, cv_sha256 = await spool_upload(cv_file)
+    sources = {
+        "GitHub": github_user,
+        "Hugging Face": huggingface_user,
+        "Personal Website": portfolio_url,
+        "Instagram": instagram_user,
+    }
+
+    async def event_stream():
+        try:
+            async for event, data in analysis_events(cv_path, cv_sha256, sources):
+                yield format_sse(event, data)
+        except HTTPException as e:
+            yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/analyze/jobs", status_code=202)
+async def create_analysis_job(
+    cv_file: UploadFile = File(...),
+    github_user: Optional[str] = Form(None),
+    huggingface_user: Optional[str] = Form(None),
+    portfolio_url: Optional[str] = Form(None),
+    instagram_user: Optional[str] = Form(None),
+):
+    """Enregistre l'analyse dans la file de jobs et retourne immédiatement son identifiant."""
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise HTTPException(status_code=500, detail="Google API key is not configured on the server.")
+
+    cv_path, cv_sha256 = await spool_upload(cv_file, directory=JOBS_UPLOAD_DIR)
+    sources = {
+        "GitHub": github_user,
+        "Hugging Face": huggingface_user,
+        "Personal Website": portfolio_url,
+        "Instagram": instagram_user,
+    }
+    job_id = await job_queue.submit(cv_path, cv_sha256, sources)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/analyze/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found.")
+    return job
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    cv_files: List[UploadFile] = File(...),
+    candidates_csv: Optional[UploadFile] = File(None),
+    concurrency: int = Form(BATCH_CONCURRENCY),
+):
+    """Analyse plusieurs CV et diffuse un résultat JSON par ligne dès que chaque candidat est terminé.
+
+    `candidates_csv` associe chaque nom de fichier (colonne `cv_file`) à ses profils externes,
+    comme pour `batch.py`. La reprise après interruption est propre à la ligne de commande.
+    """
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise HTTPException(status_code=500, detail="Google API key is not configured on the server.")
+
+    sources_by_cv = {}
+    if candidates_csv is not None:
+        sources_by_cv = parse_candidates_csv((await candidates_csv.read()).decode("utf-8-sig"))
+
+    candidates = []
+    try:
+        for cv_file in cv_files:
+            cv_path, _ = await spool_upload(cv_file)
+            candidates.append(Candidate(cv_file.filename, cv_path, sources_by_cv.get(cv_file.filename, empty_sources())))
+    except HTTPException:
+        for candidate in candidates:
+            os.unlink(candidate.cv_path)
+        raise
+
+    async def result_lines():
+        try:
+            async for record in iter_batch(analysis_events, candidates, max(1, min(concurrency, BATCH_CONCURRENCY))):
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        finally:
+            for candidate in candidates:
+                if os.path.exists(candidate.cv_path):
+                    os.unlink(candidate.cv_path)
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+def wordcloud_response(request: Request, digest: str, image_format: str, image: bytes) -> Response:
+    etag = f'"{digest}-{image_format}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image, media_type=wordcloud_renderer.MEDIA_TYPES[image_format], headers=headers)
+
+@app.post("/wordcloud")
+async def render_wordcloud(request: Request, frequencies: dict = Body(...), format: str = "png"):
+    """Dessine un nuage de mots à partir d'une carte {compétence: poids}, en PNG ou en SVG."""
+    if format not in wordcloud_renderer.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported word cloud format. Use 'png' or 'svg'.")
+    try:
+        weights = {str(word): float(weight) for word, weight in frequencies.items()}
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Word cloud frequencies must be numbers.")
+    if not all(math.isfinite(weight) for weight in weights.values()):
+        raise HTTPException(status_code=400, detail="Word cloud frequencies must be finite numbers.")
+    frequencies = {word: weight for word, weight in weights.items() if weight > 0}
+    if not frequencies:
+        raise HTTPException(status_code=400, detail="No word cloud frequencies were provided.")
+    if len(frequencies) > wordcloud_renderer.WORDCLOUD_MAX_WORDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many word cloud entries (limit: {wordcloud_renderer.WORDCLOUD_MAX_WORDS}).",
+        )
+    if any(len(word) > wordcloud_renderer.WORDCLOUD_MAX_WORD_LENGTH for word in frequencies):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Word cloud entries are limited to {wordcloud_renderer.WORDCLOUD_MAX_WORD_LENGTH} characters.",
+        )
+    digest, image = await wordcloud_renderer.render(frequencies, format)
+    return wordcloud_response(request, digest, format, image)
+
+@app.get("/wordcloud/{digest}.{image_format}")
+async def get_wordcloud(request: Request, digest: str, image_format: str):
+    if image_format not in wordcloud_renderer.MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Word cloud not found.")
+    etag = f'"{digest}-{image_format}"'
+    # L'image est adressée par son contenu : un ETag identique suffit, sans relire le cache.
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    image = await wordcloud_renderer.get_image(digest, image_format)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Word cloud not found.")
+    return wordcloud_response(request, digest, image_format, image)
+
+@app.get("/search")
+async def search_candidates(skills: str, mode: str = "all", min_confidence: Optional[str] = None, limit: int = 20):
+    """Classe les candidats déjà analysés sur une liste de compétences séparées par des virgules, sans appel au modèle."""
+    requested = [skill for skill in (part.strip() for part in skills.split(",")) if skill]
+    if not requested:
+        raise HTTPException(status_code=400, detail="At least one skill is required.")
+    if mode not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="Search mode must be 'all' or 'any'.")
+    if min_confidence is not None and min_confidence not in CONFIDENCE_WEIGHTS:
+        raise HTTPException(status_code=400, detail="min_confidence must be 'High', 'Medium' or 'Low'.")
+    return await skill_store.search(requested, mode, min_confidence, max(1, min(limit, 100)))
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Sonde de disponibilité : 503 tant que le préchauffage (client Gemini, pool PDF, parseurs) n'est pas terminé."""
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up", **readiness})
+    return {"status": "ready", **readiness}
+
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        tasks = []
-        if github_user:
-            tasks.append(get_external_data(f"https://api.github.com/users/{github_user}/repos", client))
-        if huggingface_user:
-            tasks.append(get_external_data(f"https://huggingface.co/{huggingface_user}", client))
-        if portfolio_url:
-            tasks.append(get_external_data(portfolio_url, client))
-        # NOUVEAU : Ajouter la tâche pour Instagram
-        if instagram_user:
-            tasks.append(get_instagram_bio(instagram_user, client))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    external_data_map = {}
-    if github_user:
-        external_data_map["GitHub"] = results.pop(0) if results else ""
-    if huggingface_user:
-        external_data_map["Hugging Face"] = results.pop(0) if results else ""
-    if portfolio_url:
-        external_data_map["Personal Website"] = results.pop(0) if results else ""
-    # NOUVEAU : Mapper le résultat d'Instagram
-    if instagram_user:
-        external_data_map["Instagram"] = results.pop(0) if results else ""
-
-    summary_tasks = []
-    for platform, data in external_data_map.items():
-        if data and not isinstance(data, Exception):
-            # Le nettoyage spécifique au portfolio est déjà géré dans la fonction get_external_data
-            if platform == "Personal Website":
-                soup = BeautifulSoup(data, "lxml")
-                for tag in soup(["script", "style", "nav", "footer", "header"]):
-                    tag.decompose()
-                data = soup.body.get_text(separator=" ", strip=True) if soup.body else ""
-            
-            prompt = SUMMARY_PROMPT_TEMPLATE.format(platform_name=platform, profile_text=data)
-            summary_tasks.append(call_gemini_api(prompt, ""))
-
-    summary_results = await asyncio.gather(*summary_tasks, return_exceptions=True)
-    summaries = [s for s in summary_results if isinstance(s, str)]
-
-    combined_text = cv_text + "\n\n--- External Profile Summaries ---\n" + "\n".join(summaries)
-    
-    final_response_text = await call_gemini_api(FINAL_JSON_PROMPT, combined_text)
-    
-    final_json = clean_and_parse_json(final_response_text)
-
-    return final_json
\ No newline at end of file
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"analysis": analysis_cache.stats(), "summaries": summary_cache.stats(), "http": response_cache.stats(),
+            "gemini": gemini_scheduler.stats()}
@@ -3,8 +3,6 @@ import json
 import re
 import httpx
 from bs4 import BeautifulSoup
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import PyPDF2 as pdf
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -15,6 +13,8 @@ from typing import Optional
 import io
 import base64
 
+from wordcloud_renderer import render_png, skill_frequencies
+
 # --- CONFIGURATION (inchangée) ---
 load_dotenv()
 app = FastAPI()
@@ -130,22 +130,10 @@ def extract_text_from_pdf(file_bytes):
     except Exception: return None
 
 def create_word_cloud_base64(skill_data):
-    tech_skills = skill_data.get("technical_skills", [])
-    tools = skill_data.get("tools_and_technologies", [])
-    all_skills = tech_skills + tools
-    confidence_weights = {"High": 3, "Medium": 2, "Low": 1}
-    frequencies = {s["skill"]: confidence_weights.get(s["confidence"], 1) for s in all_skills if "skill" in s}
+    # Rendu direct en PNG, sans passer par une figure matplotlib
+    frequencies = skill_frequencies(skill_data)
     if not frequencies: return None
-    wc = WordCloud(width=600, height=200, background_color=None, colormap="viridis", mode="RGBA").generate_from_frequencies(frequencies)
-    img_buffer = io.BytesIO()
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wc, interpolation="bilinear")
-    plt.axis("off")
-    plt.tight_layout(pad=0)
-    plt.savefig(img_buffer, format='png', transparent=True)
-    plt.close()
-    img_buffer.seek(0)
-    return base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+    return base64.b64encode(render_png(frequencies)).decode('utf-8')
 
 # --- LE POINT D'ENTRÉE DE L'API ---
 @app.post("/analyze/")
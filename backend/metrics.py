@@ -0,0 +1,98 @@
+import os
+import re
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+STAGE_SECONDS = Histogram(
+    "flashlight_stage_seconds",
+    "Duration of each analysis pipeline stage.",
+    ["stage", "source"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40),
+)
+GEMINI_CALL_TOKENS = Histogram(
+    "flashlight_gemini_call_tokens",
+    "Input and output tokens per Gemini call.",
+    ["model", "direction"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+GEMINI_CALLS = Counter("flashlight_gemini_calls_total", "Gemini calls by outcome.", ["model", "outcome"])
+# `host` ne prend que les valeurs github, huggingface, instagram et portfolio (voir http_client.upstream_label).
+UPSTREAM_RESPONSES = Counter(
+    "flashlight_upstream_responses_total", "Responses from external profile hosts by status code.", ["host", "status"]
+)
+PLAN_DECISIONS = Counter("flashlight_plan_decisions_total", "Synthesis plans chosen by the adaptive planner.", ["mode"])
+CACHE_LOOKUPS = Counter("flashlight_cache_lookups_total", "Cache lookups by tier result.", ["cache", "result"])
+EVENT_LOOP_LAG = Histogram(
+    "flashlight_event_loop_lag_seconds",
+    "Delay between the scheduled and actual wake-up of a periodic task.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "flashlight_event_loop_lag_last_seconds", "Most recent event-loop lag measurement.", multiprocess_mode="livemax"
+)
+
+TRACE_HEADER = "X-Flashlight-Trace"
+EVENT_LOOP_PROBE_INTERVAL = 0.25
+
+# Étapes chronométrées pour la requête en cours, seulement si le client a demandé une trace.
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("flashlight_trace", default=None)
+_SERVER_TIMING_TOKEN = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def start_trace() -> List[Tuple[str, float]]:
+    trace: List[Tuple[str, float]] = []
+    _trace.set(trace)
+    return trace
+
+
+def format_server_timing(trace: List[Tuple[str, float]]) -> str:
+    """Formate la trace pour l'en-tête standard `Server-Timing` (durées en millisecondes)."""
+    return ", ".join(
+        f"{_SERVER_TIMING_TOKEN.sub('_', name)};dur={seconds * 1000:.1f}" for name, seconds in trace
+    )
+
+
+@contextmanager
+def stage_timer(stage: str, source: str = "") -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage, source).observe(elapsed)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((f"{stage}.{source}" if source else stage, elapsed))
+
+
+def record_gemini_call(model: str, outcome: str, input_tokens: int = 0, output_tokens: int = 0) -> None:
+    GEMINI_CALLS.labels(model, outcome).inc()
+    if outcome == "ok":
+        GEMINI_CALL_TOKENS.labels(model, "input").observe(input_tokens)
+        GEMINI_CALL_TOKENS.labels(model, "output").observe(output_tokens)
+
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_PROBE_INTERVAL) -> None:
+    """Tâche de fond : tout retard de réveil au-delà de `interval` est du temps où la boucle était bloquée."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Expose les métriques du processus, ou celles de tous les workers si PROMETHEUS_MULTIPROC_DIR est défini."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
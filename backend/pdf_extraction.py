@@ -0,0 +1,229 @@
+import os
+import mmap
+import signal
+import asyncio
+import hashlib
+import tempfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+# --- CONFIGURATION ---
+CV_MAX_BYTES = int(os.getenv("FLASHLIGHT_CV_MAX_BYTES", str(10 * 1024 * 1024)))
+CV_MAX_PAGES = int(os.getenv("FLASHLIGHT_CV_MAX_PAGES", "40"))
+PDF_WORKERS = int(os.getenv("FLASHLIGHT_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_SLOW_SECONDS = float(os.getenv("FLASHLIGHT_PDF_SLOW_SECONDS", "2.0"))
+# Durée maximale de chaque tâche dans un worker ; au-delà, la tâche est interrompue dans le worker lui-même.
+PDF_TIMEOUT_SECONDS = float(os.getenv("FLASHLIGHT_PDF_TIMEOUT_SECONDS", "60"))
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class PdfExtraction:
+    text: str
+    page_count: int
+    # (numéro de page, durée en secondes), dans l'ordre des pages
+    page_timings: List[Tuple[int, float]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Retourne le pool de processus partagé, créé à la première utilisation."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Retire un pool cassé ; le suivant est recréé par `get_pool`."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# --- FONCTIONS EXÉCUTÉES DANS LES WORKERS ---
+
+def _raise_timeout(signum: int, frame: Any) -> None:
+    raise ExtractionTimeout(f"PDF parsing exceeded {PDF_TIMEOUT_SECONDS:.0f} seconds")
+
+
+@contextmanager
+def _deadline(seconds: float) -> Iterator[None]:
+    """Interrompt la tâche du worker après `seconds` (SIGALRM), sans toucher aux autres workers du pool."""
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _load_pdf_library() -> str:
+    # PyPDF2 n'est importé que dans les workers, au préchauffage ou au premier CV.
+    import PyPDF2
+
+    return PyPDF2.__version__
+
+
+def _open_reader(path: str) -> Tuple[Any, mmap.mmap]:
+    import PyPDF2 as pdf
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return pdf.PdfReader(mapped), mapped
+
+
+def _count_pages(path: str) -> int:
+    with _deadline(PDF_TIMEOUT_SECONDS):
+        reader, mapped = _open_reader(path)
+        try:
+            return len(reader.pages)
+        finally:
+            mapped.close()
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, str, float]]:
+    """Extrait le texte des pages [start, stop) et mesure le temps passé sur chacune."""
+    with _deadline(PDF_TIMEOUT_SECONDS):
+        reader, mapped = _open_reader(path)
+        try:
+            results = []
+            for index in range(start, stop):
+                started = time.perf_counter()
+                text = reader.pages[index].extract_text() or ""
+                results.append((index, text, time.perf_counter() - started))
+            return results
+        finally:
+            mapped.close()
+
+
+# --- API ASYNCHRONE ---
+
+async def warm_up_pool() -> None:
+    """Démarre tous les workers du pool et y charge PyPDF2 avant la première requête."""
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _load_pdf_library) for _ in range(PDF_WORKERS)))
+
+
+async def spool_upload(upload: UploadFile, directory: Optional[str] = None) -> Tuple[str, str]:
+    """Copie l'upload dans un fichier temporaire par blocs, en refusant les fichiers trop gros.
+
+    Retourne le chemin du fichier et le SHA-256 de son contenu.
+    """
+    fd, path = tempfile.mkstemp(prefix="flashlight-cv-", suffix=".pdf", dir=directory)
+    loop = asyncio.get_running_loop()
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > CV_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"CV file is too large (limit: {CV_MAX_BYTES // (1024 * 1024)} MB).",
+                    )
+                digest.update(chunk)
+                await loop.run_in_executor(None, spool.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    if written == 0:
+        os.unlink(path)
+        raise HTTPException(status_code=400, detail="The uploaded CV file is empty.")
+    return path, digest.hexdigest()
+
+
+def _split_pages(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+async def _extract_pages(pool: ProcessPoolExecutor, path: str) -> Tuple[int, List[List[Tuple[int, str, float]]]]:
+    loop = asyncio.get_running_loop()
+    page_count = await loop.run_in_executor(pool, _count_pages, path)
+    if page_count > CV_MAX_PAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"CV has too many pages ({page_count}, limit: {CV_MAX_PAGES}).",
+        )
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(pool, _extract_page_range, path, start, stop)
+        for start, stop in _split_pages(page_count, PDF_WORKERS)
+    ))
+    return page_count, chunks
+
+
+async def extract_text_from_pdf_path(path: str) -> PdfExtraction:
+    """Extrait le texte d'un PDF sur disque en répartissant les pages sur le pool de processus."""
+    started = time.perf_counter()
+    # Un pool cassé (worker tué par manque de mémoire) est remplacé et l'extraction retentée une fois.
+    for attempt in range(2):
+        pool = get_pool()
+        try:
+            page_count, chunks = await _extract_pages(pool, path)
+            break
+        except HTTPException:
+            raise
+        except ExtractionTimeout as e:
+            print(f"Error reading PDF: {e}")
+            raise HTTPException(
+                status_code=422,
+                detail=f"The CV could not be read within {PDF_TIMEOUT_SECONDS:.0f} seconds.",
+            )
+        except BrokenProcessPool as e:
+            print(f"Error reading PDF: {e}")
+            _discard_pool(pool)
+            if attempt:
+                # Ce n'est pas la faute du fichier envoyé : 503 plutôt que 400.
+                raise HTTPException(status_code=503, detail="PDF extraction is temporarily unavailable. Please retry.")
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+            raise HTTPException(status_code=400, detail=f"Error reading PDF file: {e}")
+
+    pages = [page for chunk in chunks for page in chunk]
+    extraction = PdfExtraction(
+        text="".join(text for _, text, _ in pages),
+        page_count=page_count,
+        page_timings=[(index + 1, seconds) for index, _, seconds in pages],
+        elapsed=time.perf_counter() - started,
+    )
+    if extraction.elapsed > PDF_SLOW_SECONDS and extraction.page_timings:
+        slowest_page, slowest = max(extraction.page_timings, key=lambda t: t[1])
+        print(
+            f"Warning: slow PDF extraction ({extraction.page_count} pages in {extraction.elapsed:.2f}s, "
+            f"slowest page {slowest_page}: {slowest:.2f}s)"
+        )
+    return extraction
+
@@ -0,0 +1,68 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from metrics import PLAN_DECISIONS, STAGE_SECONDS
+
+# --- CONFIGURATION ---
+# Au-delà de ce total (CV + sources), le prompt final reçoit des résumés plutôt que les profils bruts.
+PLANNER_SINGLE_CALL_TOKENS = int(os.getenv("FLASHLIGHT_PLANNER_SINGLE_CALL_TOKENS", "8000"))
+# Une source compactée plus volumineuse est toujours résumée, dès qu'elle est récupérée. Par défaut
+# au-dessus de FLASHLIGHT_SOURCE_TOKEN_BUDGET : seul le total décide tant que la compaction tronque.
+PLANNER_SOURCE_TOKENS = int(os.getenv("FLASHLIGHT_PLANNER_SOURCE_TOKENS", "3000"))
+# Taille typique d'un résumé de source (3-4 phrases demandées par SUMMARY_PROMPT_TEMPLATE).
+SUMMARY_TOKENS_ESTIMATE = 120
+
+
+@dataclass
+class SynthesisPlan:
+    mode: str
+    summarize: List[str] = field(default_factory=list)
+    inline: List[str] = field(default_factory=list)
+    estimated_tokens: int = 0
+
+    def as_event(self) -> dict:
+        return {
+            "mode": self.mode,
+            "summarize": self.summarize,
+            "inline": self.inline,
+            "estimated_tokens": self.estimated_tokens,
+        }
+
+
+def is_oversized(tokens: int) -> bool:
+    return tokens > PLANNER_SOURCE_TOKENS
+
+
+def plan_synthesis(
+    cv_tokens: int,
+    inline_tokens: Dict[str, int],
+    summary_tokens: Dict[str, int],
+    threshold: int = PLANNER_SINGLE_CALL_TOKENS,
+) -> SynthesisPlan:
+    """Choisit entre un appel final unique et un map-reduce, une fois toutes les sources récupérées.
+
+    `inline_tokens` contient les sources encore brutes, `summary_tokens` celles déjà résumées
+    (trop volumineuses). Tant que le total dépasse le seuil, la plus grosse source brute
+    restante est ajoutée aux sources à résumer.
+    """
+    inline = dict(inline_tokens)
+    summarize = []
+    total = cv_tokens + sum(inline.values()) + sum(summary_tokens.values())
+    for platform in sorted(inline, key=inline.get, reverse=True):
+        if total <= threshold:
+            break
+        total -= inline.pop(platform) - SUMMARY_TOKENS_ESTIMATE
+        summarize.append(platform)
+    mode = "map_reduce" if summarize or summary_tokens else "single_call"
+    return SynthesisPlan(mode, summarize, list(inline), total)
+
+
+def log_plan(plan: SynthesisPlan, summarized: List[str], elapsed: float) -> None:
+    """Trace la décision et la durée mesurée, pour ajuster les seuils du planificateur."""
+    PLAN_DECISIONS.labels(plan.mode).inc()
+    STAGE_SECONDS.labels("planned_synthesis", plan.mode).observe(elapsed)
+    print(
+        f"Planner: {plan.mode}, ~{plan.estimated_tokens} tokens, summarized={summarized}, "
+        f"inline={plan.inline}, {elapsed:.2f}s from sources to profile"
+    )
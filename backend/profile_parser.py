@@ -0,0 +1,183 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+SUMMARY_SECTION = "professional_summary"
+SKILL_CATEGORIES = ("technical_skills", "soft_skills", "tools_and_technologies")
+PROFILE_SECTIONS = (SUMMARY_SECTION,) + SKILL_CATEGORIES
+CONFIDENCE_LEVELS = ("High", "Medium", "Low")
+JSON_FENCE = "```json"
+
+
+def validate_skill(value: Any) -> Optional[dict]:
+    """Retourne l'objet compétence conforme au schéma, ou None s'il est inutilisable."""
+    if not isinstance(value, dict) or not isinstance(value.get("skill"), str) or not value["skill"].strip():
+        return None
+    confidence = str(value.get("confidence") or "").strip().capitalize()
+    evidence = value.get("evidence")
+    return {
+        "skill": value["skill"].strip(),
+        "confidence": confidence if confidence in CONFIDENCE_LEVELS else "Low",
+        "evidence": evidence.strip() if isinstance(evidence, str) else "",
+    }
+
+
+def validate_profile(value: Any) -> Tuple[dict, List[str]]:
+    """Ne garde que les sections et compétences conformes au schéma ; retourne aussi les sections absentes."""
+    value = value if isinstance(value, dict) else {}
+    profile = {}
+    summary = value.get(SUMMARY_SECTION)
+    if isinstance(summary, str) and summary.strip():
+        profile[SUMMARY_SECTION] = summary.strip()
+    for category in SKILL_CATEGORIES:
+        if isinstance(value.get(category), list):
+            profile[category] = [skill for skill in map(validate_skill, value[category]) if skill]
+    return profile, [section for section in PROFILE_SECTIONS if section not in profile]
+
+
+class ProfileStreamParser:
+    """Analyse la réponse JSON du modèle fragment par fragment, sans attendre la fin de la génération.
+
+    Un automate suit les chaînes et l'imbrication des objets/tableaux : chaque objet compétence
+    est validé dès sa fermeture et renvoyé par `feed`. Si la réponse est tronquée ou mal formée,
+    `finish` reconstruit le profil à partir des éléments complets déjà reçus.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.started = False
+        self.finished_at: Optional[int] = None
+        self.summary: Optional[str] = None
+        self.skills: Dict[str, List[dict]] = {}
+        self.closed_sections: set = set()
+        self.repaired = False
+        self._reset_scan()
+
+    def _reset_scan(self) -> None:
+        self.position = 0
+        # Pile de [type de conteneur, clé en cours, position d'ouverture]
+        self.stack: List[list] = []
+        self.in_string = False
+        self.escaped = False
+        self.string_start = 0
+        self.expect_key = False
+        self.last_string = ""
+        self.top_level_keys: set = set()
+
+    def feed(self, chunk: str) -> List[Tuple[str, dict]]:
+        if self.finished_at is not None:
+            return []
+        self.buffer += chunk
+        return self._scan() if self._start() else []
+
+    def _start(self) -> bool:
+        """Se place sur l'objet du profil : après la clôture ```json si elle existe, sinon sur la première accolade.
+
+        Le texte qui précède (préambule libre) est ignoré.
+        """
+        if self.started:
+            return True
+        fence = self.buffer.find(JSON_FENCE)
+        start = self.buffer.find("{", fence + len(JSON_FENCE) if fence >= 0 else 0)
+        if start < 0:
+            self.buffer = self.buffer[-16:]
+            return False
+        self.buffer = self.buffer[start:]
+        self.started = True
+        return True
+
+    def _scan(self) -> List[Tuple[str, dict]]:
+        found = []
+        buffer = self.buffer
+        i = self.position
+        while i < len(buffer):
+            char = buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = buffer[self.string_start:i + 1]
+                    if len(self.stack) == 1 and not self.expect_key and self.stack[0][1] == SUMMARY_SECTION:
+                        self.summary = self._decode(self.last_string)
+                i += 1
+                continue
+            if char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif char in "{[":
+                self.stack.append([char, None, i])
+                self.expect_key = char == "{"
+            elif char == ":" and self.stack and self.stack[-1][0] == "{" and self.expect_key:
+                self.stack[-1][1] = self._decode(self.last_string)
+                if len(self.stack) == 1:
+                    self.top_level_keys.add(self.stack[-1][1])
+                self.expect_key = False
+            elif char == "," and self.stack and self.stack[-1][0] == "{":
+                self.expect_key = True
+            elif char in "}]" and self.stack:
+                kind, _, start = self.stack.pop()
+                section = self.stack[0][1] if self.stack else None
+                if len(self.stack) == 2 and kind == "{" and section in SKILL_CATEGORIES:
+                    skill = self._parse_skill(buffer[start:i + 1])
+                    if skill:
+                        self.skills.setdefault(section, []).append(skill)
+                        found.append((section, skill))
+                elif len(self.stack) == 1 and kind == "[" and section in SKILL_CATEGORIES:
+                    self.skills.setdefault(section, [])
+                    self.closed_sections.add(section)
+                elif not self.stack:
+                    if self.top_level_keys.isdisjoint(PROFILE_SECTIONS):
+                        # Objet du préambule (ex. « Sure {here} is: ») : on cherche le suivant.
+                        self.buffer = buffer[i + 1:]
+                        self.started = False
+                        self._reset_scan()
+                        return found + (self._scan() if self._start() else [])
+                    self.finished_at = i + 1
+                    break
+                self.expect_key = False
+            i += 1
+        self.position = i
+        return found
+
+    @staticmethod
+    def _decode(raw: str) -> str:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return ""
+        return value if isinstance(value, str) else ""
+
+    @staticmethod
+    def _parse_skill(raw: str) -> Optional[dict]:
+        try:
+            return validate_skill(json.loads(raw))
+        except json.JSONDecodeError:
+            return None
+
+    def finish(self) -> Tuple[dict, List[str]]:
+        """Retourne le profil validé et la liste des sections manquantes.
+
+        Une réponse complète est relue d'un bloc ; sinon le profil est réparé à partir des
+        compétences complètes reçues : un tableau interrompu garde ses éléments terminés, et
+        un résumé coupé est conservé jusqu'à sa dernière phrase complète.
+        """
+        if self.finished_at is not None:
+            try:
+                return validate_profile(json.loads(self.buffer[:self.finished_at]))
+            except json.JSONDecodeError:
+                pass
+
+        self.repaired = True
+        profile = {}
+        summary = self.summary
+        if summary is None and self.in_string and len(self.stack) == 1 and self.stack[0][1] == SUMMARY_SECTION:
+            cut = self.buffer.rfind(".", self.string_start)
+            summary = self._decode(self.buffer[self.string_start:cut + 1] + '"') if cut > 0 else None
+        if summary and summary.strip():
+            profile[SUMMARY_SECTION] = summary.strip()
+        for category in SKILL_CATEGORIES:
+            if category in self.closed_sections or self.skills.get(category):
+                profile[category] = self.skills.get(category, [])
+        return profile, [section for section in PROFILE_SECTIONS if section not in profile]
@@ -0,0 +1,110 @@
+"""Lanceur multi-workers : l'application est importée une seule fois, puis partagée par fork.
+
+Usage :
+    cd backend
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+
+Le processus maître importe `main` (FastAPI, httpx, pydantic...) avant de créer les workers,
+qui partagent ces pages mémoire en copy-on-write et démarrent sans payer l'import. Les clients
+qui ne survivent pas à un fork (gRPC de Gemini, client HTTP, connexions SQLite, pools de
+processus) ne sont créés qu'après, dans le lifespan de chaque worker. Les caches SQLite et
+l'index de compétences sont partagés entre workers ; les caches mémoire restent propres à
+chacun. Un worker qui s'arrête est relancé ; SIGTERM ou Ctrl+C arrêtent proprement l'ensemble.
+"""
+import os
+import signal
+import importlib
+import socket
+import argparse
+import tempfile
+from typing import Dict, List, Optional
+
+SERVE_WORKERS = int(os.getenv("FLASHLIGHT_WORKERS", str(os.cpu_count() or 1)))
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, index: int, log_level: str) -> None:
+    import uvicorn
+
+    import main
+
+    config = uvicorn.Config(main.app, log_level=log_level)
+    print(f"Worker {index} started (pid {os.getpid()})")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int, log_level: str = "info") -> None:
+    # À définir avant le premier import de prometheus_client : /metrics agrège alors tous les workers.
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="flashlight-metrics-"))
+    # Préchargement : les workers héritent des modules déjà importés.
+    importlib.import_module("main")
+    from prometheus_client import multiprocess
+
+    sock = bind_socket(host, port)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Groupe propre au worker : ses pools de processus sont arrêtés avec lui s'il meurt.
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(sock, index, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = index
+
+    def stop(signum: int, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        multiprocess.mark_process_dead(pid)
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        if not stopping:
+            print(f"Worker {index} (pid {pid}) exited with status {status}, restarting it")
+            spawn(index)
+    sock.close()
+
+
+def run_cli(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the Flashlight API with several preloaded workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, max(1, args.workers), args.log_level)
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,312 @@
+import os
+import re
+import json
+import math
+import time
+import zlib
+import heapq
+import asyncio
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# --- CONFIGURATION ---
+SKILLS_DB_PATH = os.getenv("FLASHLIGHT_SKILLS_DB", os.path.join(os.path.dirname(__file__), "flashlight_skills.sqlite3"))
+
+SKILL_CATEGORIES = ("technical_skills", "soft_skills", "tools_and_technologies")
+CONFIDENCE_WEIGHTS = {"High": 3, "Medium": 2, "Low": 1}
+# Variantes d'écriture courantes ramenées à un seul terme du vocabulaire
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "golang": "go",
+    "gcp": "google cloud",
+    "google cloud platform": "google cloud",
+    "amazon web services": "aws",
+    "ml": "machine learning",
+    "sklearn": "scikit-learn",
+}
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_skill(name: str) -> str:
+    key = _SPACES.sub(" ", name.strip().casefold())
+    return SKILL_ALIASES.get(key, key)
+
+
+class SkillStore:
+    """Profils de compétences persistés dans SQLite, avec un index inversé compétence -> candidats en mémoire.
+
+    L'index est rechargé depuis SQLite à l'ouverture puis maintenu à chaque ajout, de sorte que
+    les recherches ne lisent la base que pour détailler les meilleurs résultats.
+    """
+
+    def __init__(self, path: str = SKILLS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._skill_ids: Dict[str, int] = {}
+        # skill_id -> {candidate_id: poids de confiance}
+        self._index: Dict[int, Dict[int, int]] = defaultdict(dict)
+        self._candidate_ids: Dict[str, int] = {}
+        # candidate_id -> compétences indexées, pour retirer l'ancien profil lors d'une mise à jour
+        self._candidate_skills: Dict[int, List[int]] = defaultdict(list)
+        # Synchronisation avec les écritures d'autres processus (serveur multi-workers)
+        self._data_version = 0
+        self._synced_version = 0
+
+    # --- Accès SQLite (exécuté dans le threadpool) ---
+
+    def open(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                return
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS skills (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    display_name TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS candidates (
+                    id INTEGER PRIMARY KEY,
+                    candidate_key TEXT NOT NULL UNIQUE,
+                    sources TEXT NOT NULL,
+                    summary TEXT,
+                    profile BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    skill_id INTEGER NOT NULL,
+                    candidate_id INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    weight INTEGER NOT NULL,
+                    confidence TEXT,
+                    evidence TEXT,
+                    PRIMARY KEY (skill_id, candidate_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS postings_candidate ON postings (candidate_id);
+                """
+            )
+            # `version` croît à chaque écriture, dans l'ordre des commits (les écritures SQLite sont
+            # sérialisées) : contrairement à l'horloge de chaque processus, aucun profil n'est sauté.
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(candidates)")}
+            if "version" not in columns:
+                try:
+                    self._conn.execute("ALTER TABLE candidates ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                except sqlite3.OperationalError as e:
+                    # Migration faite en même temps par un autre worker
+                    if "duplicate column" not in str(e):
+                        raise
+            self._conn.execute("CREATE INDEX IF NOT EXISTS candidates_version ON candidates (version)")
+            self._conn.commit()
+            self._skill_ids = dict(self._conn.execute("SELECT name, id FROM skills"))
+            self._candidate_ids = dict(self._conn.execute("SELECT candidate_key, id FROM candidates"))
+            self._index = defaultdict(dict)
+            self._candidate_skills = defaultdict(list)
+            for skill_id, candidate_id, weight in self._conn.execute("SELECT skill_id, candidate_id, weight FROM postings"):
+                self._index[skill_id][candidate_id] = weight
+                self._candidate_skills[candidate_id].append(skill_id)
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            self._synced_version = self._conn.execute("SELECT COALESCE(MAX(version), 0) FROM candidates").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _write_profile(self, candidate_key: str, sources: dict, profile: dict) -> Tuple[int, Dict[int, int], Dict[str, int]]:
+        postings: Dict[int, Tuple[str, int, str, str]] = {}
+        new_skills: Dict[str, int] = {}
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO candidates (candidate_key, sources, summary, profile, updated_at, version) "
+                "VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM candidates)) "
+                "ON CONFLICT(candidate_key) DO UPDATE SET sources = excluded.sources, summary = excluded.summary, "
+                "profile = excluded.profile, updated_at = excluded.updated_at, version = excluded.version RETURNING id",
+                (
+                    candidate_key,
+                    json.dumps(sources),
+                    profile.get("professional_summary"),
+                    zlib.compress(json.dumps(profile, ensure_ascii=False).encode("utf-8")),
+                    time.time(),
+                ),
+            )
+            candidate_id = cursor.fetchone()[0]
+            for category in SKILL_CATEGORIES:
+                for entry in profile.get(category) or []:
+                    if not isinstance(entry, dict) or not entry.get("skill"):
+                        continue
+                    name = normalize_skill(entry["skill"])
+                    skill_id = self._skill_ids.get(name) or new_skills.get(name)
+                    if skill_id is None:
+                        skill_id = self._conn.execute(
+                            "INSERT INTO skills (name, display_name) VALUES (?, ?) "
+                            "ON CONFLICT(name) DO UPDATE SET name = name RETURNING id",
+                            (name, entry["skill"].strip()),
+                        ).fetchone()[0]
+                        new_skills[name] = skill_id
+                    weight = CONFIDENCE_WEIGHTS.get(entry.get("confidence"), 1)
+                    # Une compétence citée dans plusieurs catégories garde sa meilleure confiance.
+                    if skill_id not in postings or postings[skill_id][1] < weight:
+                        postings[skill_id] = (category, weight, entry.get("confidence"), entry.get("evidence"))
+            self._conn.execute("DELETE FROM postings WHERE candidate_id = ?", (candidate_id,))
+            self._conn.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)",
+                [(skill_id, candidate_id, *posting) for skill_id, posting in postings.items()],
+            )
+            self._conn.commit()
+        return candidate_id, {skill_id: posting[1] for skill_id, posting in postings.items()}, new_skills
+
+    def _read_changes(self) -> List[Tuple[str, int, Dict[int, int], Dict[str, int]]]:
+        """Profils écrits par un autre processus depuis la dernière synchronisation.
+
+        `PRAGMA data_version` ne change qu'après un commit d'une autre connexion : sans écriture
+        extérieure, la vérification coûte une seule requête.
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+            rows = self._conn.execute(
+                "SELECT candidate_key, id, version FROM candidates WHERE version > ?", (self._synced_version,)
+            ).fetchall()
+            changes = []
+            for candidate_key, candidate_id, version in rows:
+                postings = self._conn.execute(
+                    "SELECT p.skill_id, p.weight, s.name FROM postings p JOIN skills s ON s.id = p.skill_id "
+                    "WHERE p.candidate_id = ?",
+                    (candidate_id,),
+                ).fetchall()
+                weights = {skill_id: weight for skill_id, weight, _ in postings}
+                skills = {name: skill_id for skill_id, _, name in postings}
+                changes.append((candidate_key, candidate_id, weights, skills))
+                self._synced_version = max(self._synced_version, version)
+        return changes
+
+    def profiles(self) -> List[dict]:
+        """Tous les profils enregistrés (lecture complète, réservée aux tâches de maintenance)."""
+        if self._conn is None:
+            self.open()
+        with self._lock:
+            rows = self._conn.execute("SELECT profile FROM candidates").fetchall()
+        return [json.loads(zlib.decompress(row[0])) for row in rows]
+
+    def _read_details(self, candidate_ids: List[int], skill_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not candidate_ids:
+            return {}
+        with self._lock:
+            details = {
+                row[0]: {"candidate_key": row[1], "sources": json.loads(row[2]), "professional_summary": row[3], "matched_skills": []}
+                for row in self._conn.execute(
+                    f"SELECT id, candidate_key, sources, summary FROM candidates WHERE id IN ({','.join('?' * len(candidate_ids))})",
+                    candidate_ids,
+                )
+            }
+            if skill_ids:
+                rows = self._conn.execute(
+                    f"SELECT p.candidate_id, s.display_name, p.category, p.confidence, p.evidence "
+                    f"FROM postings p JOIN skills s ON s.id = p.skill_id "
+                    f"WHERE p.candidate_id IN ({','.join('?' * len(candidate_ids))}) "
+                    f"AND p.skill_id IN ({','.join('?' * len(skill_ids))})",
+                    [*candidate_ids, *skill_ids],
+                )
+                for candidate_id, skill, category, confidence, evidence in rows:
+                    details[candidate_id]["matched_skills"].append(
+                        {"skill": skill, "category": category, "confidence": confidence, "evidence": evidence}
+                    )
+        return details
+
+    # --- API asynchrone ---
+
+    async def add_profile(self, candidate_key: str, sources: dict, profile: dict) -> None:
+        """Enregistre (ou remplace) le profil d'un candidat et met l'index en mémoire à jour."""
+        loop = asyncio.get_running_loop()
+        if self._conn is None:
+            await loop.run_in_executor(None, self.open)
+        candidate_id, weights, new_skills = await loop.run_in_executor(
+            None, self._write_profile, candidate_key, sources, profile
+        )
+        self._apply(candidate_key, candidate_id, weights, new_skills)
+
+    def _apply(self, candidate_key: str, candidate_id: int, weights: Dict[int, int], new_skills: Dict[str, int]) -> None:
+        # L'index n'est modifié que depuis la boucle d'événements, là où les recherches le lisent.
+        self._skill_ids.update(new_skills)
+        self._candidate_ids[candidate_key] = candidate_id
+        for skill_id in self._candidate_skills.pop(candidate_id, []):
+            self._index[skill_id].pop(candidate_id, None)
+        for skill_id, weight in weights.items():
+            self._index[skill_id][candidate_id] = weight
+        self._candidate_skills[candidate_id] = list(weights)
+
+    def rank(
+        self, skills: List[str], mode: str = "all", min_confidence: Optional[str] = None, limit: int = 20
+    ) -> List[Tuple[int, float]]:
+        """Retourne les (candidate_id, score) les mieux classés pour une requête multi-compétences.
+
+        `mode="all"` exige toutes les compétences, `mode="any"` au moins une. Le score additionne
+        le poids de confiance de chaque compétence trouvée, pondéré par sa rareté (idf).
+        """
+        min_weight = CONFIDENCE_WEIGHTS.get(min_confidence, 1)
+        skill_ids = [self._skill_ids.get(normalize_skill(skill)) for skill in skills]
+        if mode == "all" and None in skill_ids:
+            return []
+        total = max(len(self._candidate_ids), 1)
+        lists = []
+        for skill_id in skill_ids:
+            if skill_id is None:
+                continue
+            postings = self._index.get(skill_id, {})
+            if min_weight > 1:
+                postings = {cid: weight for cid, weight in postings.items() if weight >= min_weight}
+            lists.append((postings, math.log(1 + total / max(len(postings), 1))))
+        if not lists:
+            return []
+
+        if mode == "all":
+            # On part de la liste la plus courte pour limiter les tests d'appartenance.
+            lists.sort(key=lambda item: len(item[0]))
+            matches = set(lists[0][0])
+            for postings, _ in lists[1:]:
+                matches.intersection_update(postings)
+        else:
+            matches = set().union(*(postings for postings, _ in lists))
+
+        scores = ((cid, sum(postings.get(cid, 0) * idf for postings, idf in lists)) for cid in matches)
+        return heapq.nlargest(limit, scores, key=lambda item: (item[1], -item[0]))
+
+    async def search(
+        self, skills: List[str], mode: str = "all", min_confidence: Optional[str] = None, limit: int = 20
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if self._conn is None:
+            await loop.run_in_executor(None, self.open)
+        started = time.perf_counter()
+        for change in await loop.run_in_executor(None, self._read_changes):
+            self._apply(*change)
+        ranked = self.rank(skills, mode, min_confidence, limit)
+        skill_ids = [sid for sid in (self._skill_ids.get(normalize_skill(s)) for s in skills) if sid is not None]
+        details = await loop.run_in_executor(None, self._read_details, [cid for cid, _ in ranked], skill_ids)
+        return {
+            "query": {"skills": skills, "mode": mode, "min_confidence": min_confidence},
+            "total_candidates": len(self._candidate_ids),
+            "results": [{"score": round(score, 3), **details[cid]} for cid, score in ranked if cid in details],
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def vocabulary_size(self) -> int:
+        return len(self._skill_ids)
+
+
+skill_store = SkillStore()
@@ -0,0 +1,213 @@
+import os
+import io
+import json
+import math
+import time
+import base64
+import asyncio
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+
+from cache import TieredCache, get_store, sha256_hex
+from metrics import stage_timer
+
+# --- CONFIGURATION ---
+WORDCLOUD_WORKERS = int(os.getenv("FLASHLIGHT_WORDCLOUD_WORKERS", "2"))
+# Bornes des cartes envoyées à POST /wordcloud : le placement coûte plusieurs secondes de CPU au-delà.
+WORDCLOUD_MAX_WORDS = int(os.getenv("FLASHLIGHT_WORDCLOUD_MAX_WORDS", "200"))
+WORDCLOUD_MAX_WORD_LENGTH = int(os.getenv("FLASHLIGHT_WORDCLOUD_MAX_WORD_LENGTH", "60"))
+# Les cartes des profils analysés qui ne sont plus référencées (jobs, index de compétences, cache
+# d'analyses) sont supprimées à cette fréquence ; les plus récentes sont gardées le temps que le
+# profil qui les référence soit enregistré.
+WORDCLOUD_PRUNE_SECONDS = int(os.getenv("FLASHLIGHT_WORDCLOUD_PRUNE_SECONDS", str(6 * 3600)))
+WORDCLOUD_PRUNE_GRACE_SECONDS = 3600
+WORDCLOUD_WIDTH = 600
+WORDCLOUD_HEIGHT = 200
+MIN_FONT_SIZE = 10
+MAX_FONT_SIZE = 56
+# Palette « viridis » échantillonnée, du plus foncé au plus clair
+PALETTE = ("#440154", "#482878", "#3e4a89", "#31688e", "#26828e", "#1f9e89", "#35b779", "#6ece58", "#b5de2b")
+CONFIDENCE_WEIGHTS = {"High": 3, "Medium": 2, "Low": 1}
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# (mot, taille de police, x, y, couleur) ; (x, y) est le coin supérieur gauche du texte dessiné
+Placement = Tuple[str, int, int, int, str]
+Box = Tuple[int, int, int, int]
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Les URL de nuages sont enregistrées avec les profils (jobs, index, JSONL) : leurs cartes n'expirent
+# pas, elles ne sont supprimées que par `prune_frequencies`.
+frequency_store = TieredCache("wordcloud_frequencies", durable=True)
+image_cache = TieredCache("wordcloud_images", max_entries=128)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=WORDCLOUD_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def skill_frequencies(profile: dict) -> Dict[str, int]:
+    """Pondère les compétences techniques et outils du profil par leur niveau de confiance."""
+    skills = profile.get("technical_skills", []) + profile.get("tools_and_technologies", [])
+    return {
+        s["skill"]: CONFIDENCE_WEIGHTS.get(s.get("confidence"), 1)
+        for s in skills if isinstance(s, dict) and s.get("skill")
+    }
+
+
+def frequencies_digest(frequencies: Dict[str, float]) -> str:
+    return sha256_hex(json.dumps(frequencies, sort_keys=True))[:32]
+
+
+# --- RENDU (exécuté dans les workers) ---
+
+@lru_cache(maxsize=64)
+def _font(size: int):
+    from PIL import ImageFont
+
+    return ImageFont.load_default(size=size)
+
+
+def _layout(frequencies: Dict[str, float]) -> List[Placement]:
+    """Place les mots du plus lourd au plus léger sur une spirale partant du centre, sans chevauchement."""
+    occupied: List[Box] = []
+    words = sorted(frequencies.items(), key=lambda item: (-item[1], item[0]))
+    highest = words[0][1] if words else 1
+    placements = []
+    for rank, (word, weight) in enumerate(words):
+        size = int(MIN_FONT_SIZE + (MAX_FONT_SIZE - MIN_FONT_SIZE) * (weight / highest) ** 0.8)
+        color = PALETTE[min(rank * len(PALETTE) // max(len(words), 1), len(PALETTE) - 1)]
+        while size >= MIN_FONT_SIZE:
+            position = _find_position(occupied, _font(size).getbbox(word))
+            if position is not None:
+                x, y, box = position
+                occupied.append(box)
+                placements.append((word, size, x, y, color))
+                break
+            size -= 4
+    return placements
+
+
+def _overlaps(box: Box, occupied: List[Box]) -> bool:
+    return any(box[0] < o[2] and o[0] < box[2] and box[1] < o[3] and o[1] < box[3] for o in occupied)
+
+
+def _find_position(occupied: List[Box], bbox: Box) -> Optional[Tuple[int, int, Box]]:
+    width, height = bbox[2] - bbox[0] + 4, bbox[3] - bbox[1] + 4
+    if width >= WORDCLOUD_WIDTH or height >= WORDCLOUD_HEIGHT:
+        return None
+    center_x, center_y = (WORDCLOUD_WIDTH - width) / 2, (WORDCLOUD_HEIGHT - height) / 2
+    # Spirale d'Archimède aplatie pour suivre le format paysage du nuage
+    for step in range(3000):
+        angle = step * 0.15
+        radius = 1.5 * angle
+        x = int(center_x + radius * math.cos(angle) * (WORDCLOUD_WIDTH / WORDCLOUD_HEIGHT))
+        y = int(center_y + radius * math.sin(angle))
+        if x < 0 or y < 0 or x + width > WORDCLOUD_WIDTH or y + height > WORDCLOUD_HEIGHT:
+            continue
+        box = (x, y, x + width, y + height)
+        if not _overlaps(box, occupied):
+            return x - bbox[0] + 2, y - bbox[1] + 2, box
+    return None
+
+
+def render_png(frequencies: Dict[str, float]) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGBA", (WORDCLOUD_WIDTH, WORDCLOUD_HEIGHT), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for word, size, x, y, color in _layout(frequencies):
+        draw.text((x, y), word, font=_font(size), fill=color)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_svg(frequencies: Dict[str, float]) -> bytes:
+    elements = []
+    for word, size, x, y, color in _layout(frequencies):
+        ascent = _font(size).getmetrics()[0]
+        elements.append(
+            f'<text x="{x}" y="{y + ascent}" font-size="{size}" fill="{color}">{escape(word)}</text>'
+        )
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WORDCLOUD_WIDTH}" height="{WORDCLOUD_HEIGHT}" '
+        f'viewBox="0 0 {WORDCLOUD_WIDTH} {WORDCLOUD_HEIGHT}" font-family="sans-serif">'
+        + "".join(elements)
+        + "</svg>"
+    )
+    return svg.encode("utf-8")
+
+
+RENDERERS = {"png": render_png, "svg": render_svg}
+
+
+# --- API ASYNCHRONE ---
+
+async def register_frequencies(frequencies: Dict[str, float]) -> str:
+    """Mémorise la carte de fréquences d'un profil analysé et retourne son empreinte, utilisée dans l'URL et comme ETag."""
+    digest = frequencies_digest(frequencies)
+    await frequency_store.set(digest, frequencies)
+    return digest
+
+
+async def _render_cached(digest: str, image_format: str, frequencies: Dict[str, float]) -> bytes:
+    loop = asyncio.get_running_loop()
+    with stage_timer("wordcloud", image_format):
+        image = await loop.run_in_executor(get_pool(), RENDERERS[image_format], frequencies)
+    await image_cache.set(f"{digest}.{image_format}", base64.b64encode(image).decode("ascii"))
+    return image
+
+
+async def render(frequencies: Dict[str, float], image_format: str) -> Tuple[str, bytes]:
+    """Dessine une carte envoyée par un client, sans l'enregistrer : seule l'image passe par le cache (avec TTL)."""
+    digest = frequencies_digest(frequencies)
+    cached = await image_cache.get(f"{digest}.{image_format}")
+    if cached is not None:
+        return digest, base64.b64decode(cached)
+    return digest, await _render_cached(digest, image_format, frequencies)
+
+
+async def get_image(digest: str, image_format: str) -> Optional[bytes]:
+    """Retourne l'image du nuage pour une empreinte connue, en ne la dessinant qu'une seule fois."""
+    cached = await image_cache.get(f"{digest}.{image_format}")
+    if cached is not None:
+        return base64.b64decode(cached)
+    frequencies = await frequency_store.get(digest)
+    if frequencies is None:
+        return None
+    return await _render_cached(digest, image_format, frequencies)
+
+
+def digest_from_url(url: object) -> Optional[str]:
+    if not isinstance(url, str) or not url.startswith("/wordcloud/"):
+        return None
+    return url[len("/wordcloud/"):].split(".", 1)[0]
+
+
+def prune_frequencies(profiles: Iterable[dict]) -> int:
+    """Supprime les cartes qu'aucun des `profiles` ne référence plus (exécuté hors de la boucle d'événements)."""
+    referenced: Set[str] = set()
+    for profile in profiles:
+        digest = digest_from_url(profile.get("wordcloud_url")) if isinstance(profile, dict) else None
+        if digest:
+            referenced.add(digest)
+    store = get_store()
+    stale = [
+        key for key in store.durable_keys(frequency_store.namespace, time.time() - WORDCLOUD_PRUNE_GRACE_SECONDS)
+        if key not in referenced
+    ]
+    if stale:
+        store.delete_durable(frequency_store.namespace, stale)
+    return len(stale)